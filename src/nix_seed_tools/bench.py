@@ -0,0 +1,280 @@
+"""Seed setup-time benchmark with cold and warm runs."""
+from __future__ import annotations
+
+import json
+import math
+import shlex
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Annotated, Callable, Iterator, Sequence
+
+import typer
+
+from nix_seed_tools.nix_path_mermaid import CommandRunner, log_event, run_command
+
+# The headline benchmark from DESIGN.md.
+DEFAULT_COMMAND = "nix develop --command true"
+
+COLD_SKIPPED = "no --cold-prep command given, so no run is cold"
+
+app = typer.Typer(add_completion=False)
+
+
+def time_phase(
+    args: Sequence[str],
+    run: CommandRunner,
+    clock: Callable[[], float],
+):
+    """Inputs: command args, runner, clock. Outputs: elapsed seconds.
+
+    Side effects: Runs the command.
+    Exceptions: Raises RuntimeError on command failure.
+    """
+    start = clock()
+    run(args, None)
+    return clock() - start
+
+
+def iter_benchmark(
+    command: Sequence[str],
+    iterations: int,
+    run: CommandRunner = run_command,
+    cold_prep: Sequence[str] | None = None,
+    clock: Callable[[], float] = time.perf_counter,
+):
+    """Inputs: command, iterations, runner, cold prep command, clock.
+
+    Outputs: run records with per-phase timings, one at a time.
+    Side effects: Runs the commands.
+    Exceptions: Raises RuntimeError on command failure.
+
+    Cold runs execute cold_prep (e.g. removing the seed image or the
+    eval cache) before each timed command and are skipped without it.
+    Warm runs follow one untimed warm-up run. Yielding each record lets
+    the caller keep the timings collected before a failing run.
+    """
+    if cold_prep:
+        for iteration in range(iterations):
+            phases = {
+                "prepare": time_phase(cold_prep, run, clock),
+                "command": time_phase(command, run, clock),
+            }
+            yield {"condition": "cold", "iteration": iteration, "phases": phases}
+    run(command, None)
+    for iteration in range(iterations):
+        phases = {"command": time_phase(command, run, clock)}
+        yield {"condition": "warm", "iteration": iteration, "phases": phases}
+
+
+def run_benchmark(
+    command: Sequence[str],
+    iterations: int,
+    run: CommandRunner = run_command,
+    cold_prep: Sequence[str] | None = None,
+    clock: Callable[[], float] = time.perf_counter,
+):
+    """Inputs: see iter_benchmark. Outputs: list of run records.
+
+    Side effects: Runs the commands.
+    Exceptions: Raises RuntimeError on command failure.
+    """
+    return list(iter_benchmark(command, iterations, run, cold_prep, clock))
+
+
+def median_interval(values: Sequence[float], confidence: float = 0.95):
+    """Inputs: values, confidence.
+
+    Outputs: low and high bounds of the median and their coverage.
+    Side effects: None.
+    Exceptions: Raises ValueError on empty values.
+
+    Distribution-free: the bounds are order statistics chosen from the
+    binomial(n, 1/2) distribution, so no normality is assumed. Below six
+    values even the full range covers less than 95%, so the coverage
+    actually achieved is returned alongside the bounds.
+    """
+    if not values:
+        raise ValueError("no values for interval")
+    # Sort for order statistics, which is worth O(n log n) here.
+    ordered = sorted(values)
+    count = len(ordered)
+    alpha = 1 - confidence
+    rank = 1
+    # Step inward while the narrower interval still keeps the coverage.
+    while rank < (count + 1) / 2:
+        tail = sum(math.comb(count, index) for index in range(rank + 1))
+        if 2 * tail / 2**count > alpha:
+            break
+        rank += 1
+    outside = sum(math.comb(count, index) for index in range(rank))
+    coverage = 1 - 2 * outside / 2**count
+    return ordered[rank - 1], ordered[count - rank], coverage
+
+
+def summarize(values: Sequence[float]):
+    """Inputs: timings in seconds. Outputs: summary statistics dict.
+
+    Side effects: None.
+    Exceptions: Raises ValueError on empty values.
+    """
+    low, high, coverage = median_interval(values)
+    ordered = sorted(values)
+    # Nearest-rank percentile.
+    p95 = ordered[max(math.ceil(0.95 * len(ordered)) - 1, 0)]
+    return {
+        "n": len(ordered),
+        "median": statistics.median(ordered),
+        "p95": p95,
+        "ciLow": low,
+        "ciHigh": high,
+        "ciCoverage": coverage,
+    }
+
+
+def summarize_runs(runs: Sequence[dict[str, object]]):
+    """Inputs: run records. Outputs: summary by condition of command phase.
+
+    Side effects: None.
+    Exceptions: None.
+    """
+    timings: dict[str, list[float]] = {}
+    for record in runs:
+        timings.setdefault(str(record["condition"]), []).append(
+            record["phases"]["command"]
+        )
+    return {condition: summarize(values) for condition, values in timings.items()}
+
+
+def compare_summaries(
+    current: dict[str, dict[str, float] | None],
+    baseline: dict[str, dict[str, float] | None],
+):
+    """Inputs: current and baseline summaries. Outputs: comparison dict.
+
+    Side effects: None.
+    Exceptions: None.
+
+    A condition regresses when its median interval lies entirely above
+    the baseline's, so noise within overlapping intervals is ignored.
+    """
+    comparison: dict[str, dict[str, object]] = {}
+    for condition, stats in current.items():
+        base = baseline.get(condition)
+        # A condition that was skipped on either side has nothing to compare.
+        if stats is None or base is None:
+            continue
+        comparison[condition] = {
+            "baselineMedian": base["median"],
+            "median": stats["median"],
+            "ratio": stats["median"] / base["median"] if base["median"] else None,
+            "regression": stats["ciLow"] > base["ciHigh"],
+        }
+    return comparison
+
+
+def load_baseline(path: Path):
+    """Inputs: path to a previous benchmark json. Outputs: summary dict.
+
+    Side effects: Reads a file.
+    Exceptions: Raises ValueError when the file is missing or invalid.
+    """
+    try:
+        raw = json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError) as exc:
+        raise ValueError(f"unreadable baseline: {path}") from exc
+    summary = raw.get("summary") if isinstance(raw, dict) else None
+    if not isinstance(summary, dict):
+        raise ValueError("baseline has no summary")
+    for condition, stats in summary.items():
+        if stats is None:
+            continue
+        if not isinstance(stats, dict):
+            raise ValueError(f"baseline {condition} is not a dict")
+        for key in ("median", "ciLow", "ciHigh"):
+            value = stats.get(key)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"baseline {condition} has no numeric {key}")
+    return summary
+
+
+@app.command()
+def main(
+    command: Annotated[str, typer.Option("--command")] = DEFAULT_COMMAND,
+    # Six runs is the fewest whose median interval reaches 95% coverage.
+    iterations: Annotated[int, typer.Option("-n")] = 6,
+    cold_prep: Annotated[str | None, typer.Option("--cold-prep")] = None,
+    baseline: Annotated[Path | None, typer.Option("--baseline")] = None,
+    output: Annotated[Path | None, typer.Option("--output")] = None,
+):
+    """Inputs: command, iterations, cold prep, baseline and output paths.
+
+    Outputs: json results on stdout, or in output when given.
+    Side effects: Runs the benchmark commands.
+    Exceptions: Raises typer.Exit with code 1 on a failed command or a
+    regression.
+    """
+    if iterations < 1:
+        log_event("error", "iterations must be positive")
+        raise typer.Exit(code=2)
+    try:
+        base = load_baseline(baseline) if baseline else None
+    except ValueError as exc:
+        log_event("error", "invalid baseline", error=str(exc))
+        raise typer.Exit(code=2) from exc
+    if not cold_prep:
+        log_event("warning", "cold runs skipped", reason=COLD_SKIPPED)
+    runs: list[dict[str, object]] = []
+    error = None
+    try:
+        runs.extend(
+            iter_benchmark(
+                shlex.split(command),
+                iterations,
+                run_command,
+                shlex.split(cold_prep) if cold_prep else None,
+                time.perf_counter,
+            )
+        )
+    except RuntimeError as exc:
+        error = str(exc)
+    summary: dict[str, dict[str, float] | None] = summarize_runs(runs)
+    skipped: dict[str, str] = {}
+    if not cold_prep:
+        summary["cold"] = None
+        skipped["cold"] = COLD_SKIPPED
+    comparison = compare_summaries(summary, base) if base is not None else {}
+    result = {
+        "command": command,
+        "coldPrep": cold_prep,
+        "iterations": iterations,
+        "runs": runs,
+        "summary": summary,
+        "skipped": skipped,
+        "comparison": comparison,
+        "error": error,
+    }
+    text = json.dumps(result, indent=2) + "\n"
+    if output:
+        output.write_text(text)
+    else:
+        sys.stdout.write(text)
+    if error is not None:
+        log_event("error", "benchmark command failed", error=error, runs=len(runs))
+        raise typer.Exit(code=1)
+    regressed = [name for name, item in comparison.items() if item["regression"]]
+    if regressed:
+        log_event("error", "setup time regression", conditions=regressed)
+        raise typer.Exit(code=1)
+
+
+time_phase.__annotations__["return"] = float
+iter_benchmark.__annotations__["return"] = Iterator[dict[str, object]]
+run_benchmark.__annotations__["return"] = list[dict[str, object]]
+median_interval.__annotations__["return"] = tuple[float, float, float]
+summarize.__annotations__["return"] = dict[str, float]
+summarize_runs.__annotations__["return"] = dict[str, dict[str, float]]
+compare_summaries.__annotations__["return"] = dict[str, dict[str, object]]
+load_baseline.__annotations__["return"] = dict[str, dict[str, float] | None]
+main.__annotations__["return"] = None
@@ -0,0 +1,182 @@
+"""Path info from a local file:// binary cache, without a Nix daemon."""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from nix_seed_tools.nix_path_mermaid import (
+    PathInfo,
+    coerce_int,
+    render_mermaid,
+    store_name,
+)
+
+STORE_DIR = "/nix/store"
+
+
+def store_hash(store_path: str):
+    """Inputs: store path. Outputs: hash part used to name the narinfo.
+
+    Side effects: None.
+    Exceptions: Raises ValueError when path is not a store path.
+    """
+    if not store_path.startswith(f"{STORE_DIR}/"):
+        raise ValueError("path is not in /nix/store")
+    base = store_path.removeprefix(f"{STORE_DIR}/")
+    hash_part, sep, _name = base.partition("-")
+    if not sep or not hash_part or "/" in base:
+        raise ValueError("store path has no hash part")
+    return hash_part
+
+
+def parse_narinfo(text: str):
+    """Inputs: narinfo text. Outputs: PathInfo without closure size.
+
+    Side effects: None.
+    Exceptions: Raises ValueError on missing StorePath or bad sizes.
+
+    Example:
+        parse_narinfo("StorePath: /nix/store/a-foo\\nNarSize: 10\\n")
+    """
+    fields: dict[str, str] = {}
+    for line in text.splitlines():
+        key, sep, value = line.partition(":")
+        if sep:
+            fields[key.strip()] = value.strip()
+    path = fields.get("StorePath")
+    if not path:
+        raise ValueError("narinfo has no StorePath")
+    # References and Deriver are base names relative to the store dir.
+    references = [
+        f"{STORE_DIR}/{ref}" for ref in fields.get("References", "").split()
+    ]
+    deriver = fields.get("Deriver")
+    return PathInfo(
+        path=path,
+        nar_size=coerce_int(fields.get("NarSize")),
+        closure_size=None,
+        references=references,
+        file_size=coerce_int(fields.get("FileSize")),
+        deriver=f"{STORE_DIR}/{deriver}" if deriver else None,
+    )
+
+
+def read_narinfo(cache_dir: Path, store_path: str):
+    """Inputs: cache dir, store path. Outputs: PathInfo for the path.
+
+    Side effects: Reads a narinfo file.
+    Exceptions: Raises ValueError when the narinfo is missing or invalid.
+    """
+    narinfo = cache_dir / f"{store_hash(store_path)}.narinfo"
+    try:
+        text = narinfo.read_text()
+    except FileNotFoundError as exc:
+        raise ValueError(f"narinfo missing for {store_path}") from exc
+    info = parse_narinfo(text)
+    if info.path != store_path:
+        raise ValueError(f"narinfo StorePath mismatch for {store_path}")
+    return info
+
+
+def closure_sizes(path_info: dict[str, PathInfo]):
+    """Inputs: path info map. Outputs: map of path to closure nar size.
+
+    Side effects: None.
+    Exceptions: None.
+    """
+    closures: dict[str, set[str]] = {}
+
+    def closure(path: str):
+        if path in closures:
+            return closures[path]
+        # Mark before descending so self-references terminate.
+        seen = closures[path] = {path}
+        for ref in path_info[path].references:
+            if ref != path and ref in path_info:
+                seen |= closure(ref)
+        return seen
+
+    sizes: dict[str, int] = {}
+    for path in path_info:
+        sizes[path] = sum(path_info[ref].nar_size or 0 for ref in closure(path))
+    return sizes
+
+
+def load_cache_path_info(
+    cache_dir: Path,
+    store_path: str,
+    max_workers: int = 16,
+):
+    """Inputs: cache dir, root store path, worker count.
+
+    Outputs: path info map for the closure, with closure sizes.
+    Side effects: Reads narinfo files using a thread pool.
+    Exceptions: Raises ValueError when a narinfo is missing or invalid.
+
+    Example:
+        load_cache_path_info(Path("/tmp/cache"), "/nix/store/hash-name")
+    """
+    if not cache_dir.is_dir():
+        raise ValueError(f"binary cache dir missing: {cache_dir}")
+    path_info: dict[str, PathInfo] = {}
+    frontier = [store_path]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # Breadth-first so each level's narinfo reads run concurrently.
+        while frontier:
+            infos = list(
+                pool.map(lambda path: read_narinfo(cache_dir, path), frontier)
+            )
+            for info in infos:
+                path_info[info.path] = info
+            frontier = sorted(
+                {
+                    ref
+                    for info in infos
+                    for ref in info.references
+                    if ref not in path_info
+                }
+            )
+    sizes = closure_sizes(path_info)
+    return {
+        path: PathInfo(
+            path=path,
+            nar_size=info.nar_size,
+            closure_size=sizes[path],
+            references=info.references,
+            file_size=info.file_size,
+            deriver=info.deriver,
+        )
+        for path, info in path_info.items()
+    }
+
+
+def title_map_from_derivers(path_info: dict[str, PathInfo]):
+    """Inputs: path info map. Outputs: title map from deriver names.
+
+    Side effects: None.
+    Exceptions: None.
+    """
+    title_map: dict[str, str] = {}
+    for path, info in path_info.items():
+        if info.deriver:
+            title_map[path] = store_name(info.deriver).removesuffix(".drv")
+    return title_map
+
+
+def generate_cache_mermaid(cache_dir: Path, store_path: str):
+    """Inputs: cache dir, root store path. Outputs: mermaid string.
+
+    Side effects: Reads narinfo files.
+    Exceptions: Raises ValueError when the cache is incomplete.
+    """
+    path_info = load_cache_path_info(cache_dir, store_path)
+    return render_mermaid(path_info, title_map_from_derivers(path_info))
+
+
+store_hash.__annotations__["return"] = str
+parse_narinfo.__annotations__["return"] = PathInfo
+read_narinfo.__annotations__["return"] = PathInfo
+closure_sizes.__annotations__["return"] = dict[str, int]
+load_cache_path_info.__annotations__["return"] = dict[str, PathInfo]
+title_map_from_derivers.__annotations__["return"] = dict[str, str]
+generate_cache_mermaid.__annotations__["return"] = str
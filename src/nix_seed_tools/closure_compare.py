@@ -0,0 +1,355 @@
+"""Cross-system closure comparison for `.seed.lock` targets."""
+from __future__ import annotations
+
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Annotated, Sequence
+
+import typer
+
+from nix_seed_tools.nix_path_mermaid import (
+    CommandRunner,
+    PathInfo,
+    human_size,
+    load_path_info,
+    log_event,
+    resolve_store_path,
+    run_command,
+    store_name,
+    title_map_for_paths,
+)
+
+app = typer.Typer(add_completion=False)
+
+
+class TitleCache:
+    """Title lookups shared between per-system workers.
+
+    Paths common to several systems (sources, fixed-output fetches) are
+    queried once; a worker needing a path another worker is fetching
+    waits for it instead of querying again.
+    """
+
+    def __init__(self, run: CommandRunner):
+        self.run = run
+        self.titles: dict[str, str | None] = {}
+        self.pending: set[str] = set()
+        self.condition = threading.Condition()
+
+    def lookup(self, paths: Sequence[str]):
+        with self.condition:
+            missing = [
+                path
+                for path in paths
+                if path not in self.titles and path not in self.pending
+            ]
+            self.pending.update(missing)
+        fetched: dict[str, str] = {}
+        try:
+            if missing:
+                fetched = title_map_for_paths(missing, self.run)
+        finally:
+            with self.condition:
+                for path in missing:
+                    self.titles[path] = fetched.get(path)
+                self.pending.difference_update(missing)
+                self.condition.notify_all()
+        with self.condition:
+            self.condition.wait_for(lambda: self.pending.isdisjoint(paths))
+            return {
+                path: title
+                for path in paths
+                if (title := self.titles.get(path)) is not None
+            }
+
+
+def parse_roots(values: Sequence[str]):
+    """Inputs: SYSTEM=PATH values. Outputs: map of system to root path.
+
+    Side effects: None.
+    Exceptions: Raises ValueError on malformed or duplicate systems.
+
+    Example:
+        parse_roots(["x86_64-linux=./result-x86_64"])
+    """
+    roots: dict[str, str] = {}
+    for value in values:
+        system, sep, root = value.partition("=")
+        if not sep or not system or not root:
+            raise ValueError(f"expected SYSTEM=PATH, got {value}")
+        if system in roots:
+            raise ValueError(f"duplicate system {system}")
+        roots[system] = root
+    return roots
+
+
+def load_closures(
+    roots: dict[str, Path],
+    run: CommandRunner = run_command,
+):
+    """Inputs: root path by system, runner.
+
+    Outputs: path info by system, shared title map.
+    Side effects: Runs nix commands, one worker per system.
+    Exceptions: Raises RuntimeError on command failure.
+    """
+    cache = TitleCache(run)
+
+    def load(root: Path):
+        path_info = load_path_info(root, run)
+        cache.lookup(list(path_info))
+        return path_info
+
+    with ThreadPoolExecutor(max_workers=max(len(roots), 1)) as pool:
+        futures = {system: pool.submit(load, root) for system, root in roots.items()}
+        closures = {system: future.result() for system, future in futures.items()}
+    titles = {path: title for path, title in cache.titles.items() if title}
+    return closures, titles
+
+
+def align(closures: dict[str, dict[str, PathInfo]]):
+    """Inputs: path info by system. Outputs: paths by name and system.
+
+    Side effects: None.
+    Exceptions: None.
+
+    Paths align on their store name (name, version and output), which
+    is the same on every system while the hash differs. A name can cover
+    several paths in one system (fixed-output `source` paths), so each
+    system keeps its own list rather than one merged entry.
+    """
+    aligned: dict[str, dict[str, list[str]]] = {}
+    for system, path_info in closures.items():
+        # Sort for deterministic output, which is worth O(n log n) here.
+        for path in sorted(path_info):
+            aligned.setdefault(store_name(path), {}).setdefault(system, []).append(path)
+    return aligned
+
+
+def paths_size(path_info: dict[str, PathInfo], paths: Sequence[str]):
+    """Inputs: path info map, paths. Outputs: summed nar size in bytes.
+
+    Side effects: None.
+    Exceptions: None.
+    """
+    return sum(path_info[path].nar_size or 0 for path in paths)
+
+
+def compare_report(
+    roots: dict[str, str],
+    closures: dict[str, dict[str, PathInfo]],
+    limit: int = 10,
+):
+    """Inputs: roots, path info by system, divergence limit.
+
+    Outputs: report dict with per-system totals, unique names and the
+    heaviest divergences.
+    Side effects: None.
+    Exceptions: None.
+
+    A name diverges when its path count or its total nar size differs
+    between systems.
+    """
+    systems = list(closures)
+    aligned = align(closures)
+    totals = {
+        system: {
+            "root": roots[system],
+            "paths": len(path_info),
+            "narSize": sum(info.nar_size or 0 for info in path_info.values()),
+        }
+        for system, path_info in closures.items()
+    }
+    unique: dict[str, list[dict[str, object]]] = {system: [] for system in systems}
+    divergences: list[dict[str, object]] = []
+    # Sort for deterministic output, which is worth O(n log n) here.
+    for name in sorted(aligned):
+        paths = aligned[name]
+        sizes = {
+            system: paths_size(closures[system], found)
+            for system, found in paths.items()
+        }
+        if len(paths) == 1 and len(systems) > 1:
+            [(system, found)] = paths.items()
+            unique[system].append(
+                {"name": name, "paths": len(found), "narSize": sizes[system]}
+            )
+        per_system = {system: sizes.get(system, 0) for system in systems}
+        counts = {system: len(paths.get(system, [])) for system in systems}
+        spread = max(per_system.values()) - min(per_system.values())
+        if spread or len(set(counts.values())) > 1:
+            divergences.append(
+                {"name": name, "sizes": per_system, "counts": counts, "spread": spread}
+            )
+    for items in unique.values():
+        items.sort(key=lambda item: -item["narSize"])
+    divergences.sort(key=lambda item: -item["spread"])
+    return {
+        "systems": totals,
+        "unique": unique,
+        "divergences": divergences[:limit],
+    }
+
+
+def format_table(report: dict[str, object]):
+    """Inputs: compare report. Outputs: plain text tables.
+
+    Side effects: None.
+    Exceptions: None.
+    """
+    totals = report["systems"]
+    systems = list(totals)
+    width = max([len("system"), *(len(system) for system in systems)])
+    lines = [f"{'system':<{width}}  {'paths':>6}  {'nar size':>10}"]
+    for system, total in totals.items():
+        lines.append(
+            f"{system:<{width}}  {total['paths']:>6}  "
+            f"{human_size(total['narSize']):>10}"
+        )
+    for system, items in report["unique"].items():
+        if not items:
+            continue
+        size = sum(item["narSize"] for item in items)
+        count = sum(item["paths"] for item in items)
+        lines.append("")
+        lines.append(f"only in {system}: {count} paths, {human_size(size)}")
+        for item in items:
+            lines.append(f"  {item['name']}  {human_size(item['narSize'])}")
+    if report["divergences"]:
+        names = [item["name"] for item in report["divergences"]]
+        name_width = max(len("name"), *(len(name) for name in names))
+        columns = [max(len(system), 14) for system in systems]
+        lines.append("")
+        lines.append(
+            f"{'name':<{name_width}}  "
+            + "  ".join(
+                f"{system:>{column}}" for system, column in zip(systems, columns)
+            )
+            + f"  {'spread':>10}"
+        )
+        for item in report["divergences"]:
+            cells = []
+            for system, column in zip(systems, columns):
+                cell = human_size(item["sizes"][system])
+                # Show the path count when a name is not one path per system.
+                if item["counts"][system] != 1:
+                    cell += f" ({item['counts'][system]})"
+                cells.append(f"{cell:>{column}}")
+            lines.append(
+                f"{item['name']:<{name_width}}  {'  '.join(cells)}  "
+                f"{human_size(item['spread']):>10}"
+            )
+    return "\n".join(lines)
+
+
+def combined_mermaid(
+    closures: dict[str, dict[str, PathInfo]],
+    titles: dict[str, str],
+):
+    """Inputs: path info by system, title map. Outputs: mermaid string.
+
+    Side effects: None.
+    Exceptions: None.
+
+    One node per aligned name, labelled with its size on each system and
+    coloured by whether every system has it. Names covering several paths
+    in one system cannot be paired across systems, so each of their
+    paths keeps a node of its own.
+    """
+    systems = list(closures)
+    aligned = align(closures)
+    node_keys: dict[str, str] = {}
+    members: dict[str, dict[str, list[str]]] = {}
+    for name, paths in aligned.items():
+        if all(len(found) == 1 for found in paths.values()):
+            node_keys.update((path, name) for found in paths.values() for path in found)
+            members[name] = paths
+            continue
+        for system, found in paths.items():
+            for path in found:
+                node_keys[path] = path
+                members[path] = {system: [path]}
+    # Sort for deterministic output, which is worth O(n log n) here.
+    ordered = sorted(members)
+    node_ids = {key: f"n{index}" for index, key in enumerate(ordered)}
+    display: dict[str, str] = {}
+    edges: set[tuple[str, str]] = set()
+    for path_info in closures.values():
+        for path, info in path_info.items():
+            key = node_keys[path]
+            display.setdefault(key, titles.get(path) or store_name(path))
+            # Self-references and same-node paths collapse to one node.
+            edges.update(
+                (node_ids[key], node_ids[node_keys[ref]])
+                for ref in info.references
+                if ref in path_info and node_keys[ref] != key
+            )
+    lines = [
+        "graph TD",
+        "classDef shared fill:#8fd694,stroke:#333,stroke-width:1px",
+        "classDef partial fill:#f4a6a6,stroke:#333,stroke-width:1px",
+    ]
+    for key in ordered:
+        paths = members[key]
+        label = "\\n".join(
+            [
+                display[key],
+                *(
+                    f"{system} {human_size(paths_size(closures[system], found))}"
+                    for system, found in paths.items()
+                ),
+            ]
+        ).replace('"', "'")
+        node_id = node_ids[key]
+        lines.append(f'{node_id}["{label}"]')
+        shared = "shared" if len(paths) == len(systems) else "partial"
+        lines.append(f"class {node_id} {shared}")
+    for source, target in sorted(edges):
+        lines.append(f"{source} --- {target}")
+    return "\n".join(lines)
+
+
+@app.command()
+def main(
+    roots: list[str],
+    mermaid: Annotated[Path | None, typer.Option("--mermaid")] = None,
+    limit: Annotated[int, typer.Option("--limit")] = 10,
+):
+    """Inputs: SYSTEM=PATH roots, optional mermaid output, limit.
+
+    Outputs: comparison tables on stdout.
+    Side effects: Runs nix commands, writes the mermaid file when given.
+    Exceptions: Raises typer.Exit on invalid input.
+    """
+    try:
+        root_map = parse_roots(roots)
+        resolved = {
+            system: resolve_store_path(root) for system, root in root_map.items()
+        }
+    except ValueError as exc:
+        log_event("error", "invalid root", error=str(exc))
+        raise typer.Exit(code=2) from exc
+    closures, titles = load_closures(resolved, run_command)
+    report = compare_report(
+        {system: str(root) for system, root in resolved.items()},
+        closures,
+        limit,
+    )
+    sys.stdout.write(format_table(report) + "\n")
+    if mermaid:
+        mermaid.write_text(combined_mermaid(closures, titles) + "\n")
+
+
+TitleCache.lookup.__annotations__["return"] = dict[str, str]
+parse_roots.__annotations__["return"] = dict[str, str]
+load_closures.__annotations__["return"] = tuple[
+    dict[str, dict[str, PathInfo]], dict[str, str]
+]
+align.__annotations__["return"] = dict[str, dict[str, list[str]]]
+paths_size.__annotations__["return"] = int
+compare_report.__annotations__["return"] = dict[str, object]
+format_table.__annotations__["return"] = str
+combined_mermaid.__annotations__["return"] = str
+main.__annotations__["return"] = None
@@ -0,0 +1,283 @@
+"""Build critical-path analysis over the derivation graph."""
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from typing import Annotated
+
+import typer
+
+from nix_seed_tools.nix_path_mermaid import (
+    CommandRunner,
+    absolute_store_path,
+    log_event,
+    parse_input_drvs,
+    resolve_drv,
+    resolve_store_path,
+    run_command,
+    store_name,
+)
+
+app = typer.Typer(add_completion=False)
+
+
+def load_derivation_graph(root_drv: str, run: CommandRunner):
+    """Inputs: root drv path, runner. Outputs: map of drv to input drvs.
+
+    Side effects: Runs nix derivation show --recursive once.
+    Exceptions: Raises ValueError on unsupported or incomplete json.
+
+    One recursive call instead of one per graph level: bootstrap chains
+    are deep, and each level would otherwise cost a nix process.
+    """
+    output = run(
+        ["nix", "derivation", "show", "--recursive", "--no-pretty", root_drv],
+        None,
+    )
+    data = json.loads(output)
+    if not isinstance(data, dict):
+        raise ValueError("derivation json is not a dict")
+    graph: dict[str, list[str]] = {}
+    for drv, drv_info in data.items():
+        if not isinstance(drv_info, dict):
+            raise ValueError(f"derivation entry is not a dict: {drv}")
+        # Sort for deterministic traversal, which is worth O(n log n) here.
+        graph[absolute_store_path(drv)] = sorted(parse_input_drvs(drv_info))
+    missing = {dep for inputs in graph.values() for dep in inputs if dep not in graph}
+    if root_drv not in graph:
+        missing.add(root_drv)
+    if missing:
+        raise ValueError(f"derivation missing from output: {min(missing)}")
+    return graph
+
+
+def drv_name(drv: str):
+    """Inputs: drv path. Outputs: derivation name.
+
+    Side effects: None.
+    Exceptions: None.
+    """
+    return store_name(drv).removesuffix(".drv")
+
+
+def load_timings(path: Path):
+    """Inputs: timings json path. Outputs: map of drv path or name to seconds.
+
+    Side effects: Reads a file.
+    Exceptions: Raises ValueError when the file is missing or invalid.
+
+    Example:
+        {"/nix/store/aaaaa-foo-1.0.drv": 12.5, "bar-2.0": 3}
+    """
+    try:
+        raw = json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError) as exc:
+        raise ValueError(f"unreadable timings: {path}") from exc
+    if not isinstance(raw, dict):
+        raise ValueError("timings is not a dict")
+    timings: dict[str, float] = {}
+    for key, value in raw.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"timing for {key} is not a number")
+        timings[key] = float(value)
+    return timings
+
+
+def durations_for(
+    graph: dict[str, list[str]],
+    timings: dict[str, float],
+    default: float = 0.0,
+):
+    """Inputs: graph, timings, default seconds. Outputs: duration by drv.
+
+    Side effects: None.
+    Exceptions: None.
+
+    Timings match by drv path first, then by derivation name.
+    """
+    durations: dict[str, float] = {}
+    for drv in graph:
+        duration = timings.get(drv)
+        if duration is None:
+            duration = timings.get(drv_name(drv), default)
+        durations[drv] = duration
+    return durations
+
+
+def topological_order(graph: dict[str, list[str]], root: str):
+    """Inputs: graph, root. Outputs: reachable drvs, inputs first.
+
+    Side effects: None.
+    Exceptions: None.
+    """
+    order: list[str] = []
+    visited: set[str] = set()
+    # Iterative post-order so deep bootstrap chains do not hit recursion limits.
+    stack = [(root, False)]
+    while stack:
+        drv, expanded = stack.pop()
+        if expanded:
+            order.append(drv)
+            continue
+        if drv in visited:
+            continue
+        visited.add(drv)
+        stack.append((drv, True))
+        stack.extend((dep, False) for dep in graph.get(drv, []) if dep not in visited)
+    return order
+
+
+def schedule(
+    graph: dict[str, list[str]],
+    durations: dict[str, float],
+    root: str,
+):
+    """Inputs: graph, durations, root.
+
+    Outputs: earliest finish by drv, slack by drv, makespan.
+    Side effects: None.
+    Exceptions: None.
+
+    Assumes unlimited build slots, so the makespan is the longest
+    weighted path: the lower bound on a many-core runner.
+    """
+    order = topological_order(graph, root)
+    finish: dict[str, float] = {}
+    for drv in order:
+        start = max((finish[dep] for dep in graph.get(drv, [])), default=0.0)
+        finish[drv] = start + durations.get(drv, 0.0)
+    makespan = finish[root]
+    latest = {drv: makespan for drv in order}
+    for drv in reversed(order):
+        latest_start = latest[drv] - durations.get(drv, 0.0)
+        for dep in graph.get(drv, []):
+            latest[dep] = min(latest[dep], latest_start)
+    slack = {drv: latest[drv] - finish[drv] for drv in order}
+    return finish, slack, makespan
+
+
+def critical_path(
+    graph: dict[str, list[str]],
+    finish: dict[str, float],
+    root: str,
+):
+    """Inputs: graph, earliest finish, root. Outputs: drvs leaf to root.
+
+    Side effects: None.
+    Exceptions: None.
+    """
+    path = [root]
+    inputs = graph.get(root, [])
+    while inputs:
+        drv = max(inputs, key=lambda dep: (finish[dep], dep))
+        path.append(drv)
+        inputs = graph.get(drv, [])
+    path.reverse()
+    return path
+
+
+def saving_if_cached(
+    graph: dict[str, list[str]],
+    durations: dict[str, float],
+    root: str,
+    drv: str,
+    makespan: float,
+):
+    """Inputs: graph, durations, root, drv, current makespan.
+
+    Outputs: seconds saved when drv is already in the seed.
+    Side effects: None.
+    Exceptions: None.
+
+    A cached drv is neither built nor needs its inputs built.
+    """
+    cached_graph = {**graph, drv: []}
+    cached_durations = {**durations, drv: 0.0}
+    _finish, _slack, cached = schedule(cached_graph, cached_durations, root)
+    return makespan - cached
+
+
+def critical_path_report(
+    graph: dict[str, list[str]],
+    durations: dict[str, float],
+    root: str,
+):
+    """Inputs: graph, durations, root. Outputs: report dict.
+
+    Side effects: None.
+    Exceptions: None.
+    """
+    finish, slack, makespan = schedule(graph, durations, root)
+    path = critical_path(graph, finish, root)
+    # Sort by slack so the drvs that gate wall-clock time come first.
+    ordered = sorted(finish, key=lambda drv: (slack[drv], -durations[drv], drv))
+    return {
+        "root": root,
+        "makespan": makespan,
+        "totalWork": sum(durations[drv] for drv in finish),
+        "criticalPath": [
+            {
+                "drv": drv,
+                "name": drv_name(drv),
+                "duration": durations[drv],
+                "savingIfCached": saving_if_cached(
+                    graph, durations, root, drv, makespan
+                ),
+            }
+            for drv in path
+        ],
+        "derivations": [
+            {
+                "drv": drv,
+                "name": drv_name(drv),
+                "duration": durations[drv],
+                "earliestStart": finish[drv] - durations[drv],
+                "slack": slack[drv],
+            }
+            for drv in ordered
+        ],
+    }
+
+
+@app.command()
+def main(
+    root: str,
+    timings: Annotated[Path, typer.Option("--timings")],
+    default_duration: Annotated[float, typer.Option("--default-duration")] = 0.0,
+):
+    """Inputs: root drv or output path, timings file, default seconds.
+
+    Outputs: json report on stdout.
+    Side effects: Runs nix commands and writes to stdout.
+    Exceptions: Raises typer.Exit on invalid input.
+    """
+    try:
+        resolved = resolve_store_path(root)
+        timing_map = load_timings(timings)
+    except ValueError as exc:
+        log_event("error", "invalid input", error=str(exc))
+        raise typer.Exit(code=2) from exc
+    try:
+        root_drv = resolve_drv(str(resolved), run_command)
+        graph = load_derivation_graph(root_drv, run_command)
+    except ValueError as exc:
+        log_event("error", "invalid derivation", error=str(exc))
+        raise typer.Exit(code=1) from exc
+    durations = durations_for(graph, timing_map, default_duration)
+    report = critical_path_report(graph, durations, root_drv)
+    sys.stdout.write(json.dumps(report, indent=2) + "\n")
+
+
+load_derivation_graph.__annotations__["return"] = dict[str, list[str]]
+drv_name.__annotations__["return"] = str
+load_timings.__annotations__["return"] = dict[str, float]
+durations_for.__annotations__["return"] = dict[str, float]
+topological_order.__annotations__["return"] = list[str]
+schedule.__annotations__["return"] = tuple[
+    dict[str, float], dict[str, float], float
+]
+critical_path.__annotations__["return"] = list[str]
+saving_if_cached.__annotations__["return"] = float
+critical_path_report.__annotations__["return"] = dict[str, object]
+main.__annotations__["return"] = None
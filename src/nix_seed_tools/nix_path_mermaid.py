@@ -8,7 +8,9 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Callable, Protocol, Sequence
 
-import typer
+# CI calls this entry point many times per job, so startup is budgeted at
+# 50 ms of imports (see test_import_time_budget): typer is only imported
+# when its CLI parsing is needed.
 
 
 class CommandRunner(Protocol):
@@ -21,9 +23,8 @@ class PathInfo:
     nar_size: int | None
     closure_size: int | None
     references: list[str]
-
-
-app = typer.Typer(add_completion=False)
+    file_size: int | None = None
+    deriver: str | None = None
 
 
 def log_event(level: str, message: str, **fields: object):
@@ -139,15 +140,34 @@ def parse_path_info_json(raw: object):
         ref_list = [ref for ref in references if isinstance(ref, str)]
         nar_size = coerce_int(item.get("narSize") or item.get("size"))
         closure_size = coerce_int(item.get("closureSize"))
+        deriver = item.get("deriver")
         path_map[path] = PathInfo(
             path=path,
             nar_size=nar_size,
             closure_size=closure_size,
             references=ref_list,
+            deriver=deriver if isinstance(deriver, str) else None,
         )
     return path_map
 
 
+def absolute_store_path(path: str):
+    """Inputs: store path with or without the store directory.
+
+    Outputs: absolute store path.
+    Side effects: None.
+    Exceptions: None.
+
+    Newer nix derivation json omits the store directory from every path.
+
+    Example:
+        absolute_store_path("aaaaa-foo-1.0")
+    """
+    if path.startswith("/"):
+        return path
+    return f"/nix/store/{path}"
+
+
 def parse_derivation_json(raw: object):
     """Inputs: raw derivation json. Outputs: path title map.
 
@@ -182,10 +202,69 @@ def parse_derivation_json(raw: object):
                 continue
             output_path = output.get("path")
             if isinstance(output_path, str):
-                title_map[output_path] = title
+                title_map[absolute_store_path(output_path)] = title
     return title_map
 
 
+def parse_input_drvs(drv_info: dict[str, object]):
+    """Inputs: single derivation json. Outputs: map of input drv to outputs.
+
+    Side effects: None.
+    Exceptions: Raises ValueError on unsupported format.
+
+    Example:
+        parse_input_drvs(
+            {"inputDrvs": {"/nix/store/a.drv": {"outputs": ["out"]}}}
+        )
+    """
+    input_drvs = drv_info.get("inputDrvs", {})
+    if not isinstance(input_drvs, dict):
+        raise ValueError("inputDrvs is not a dict")
+    drv_map: dict[str, list[str]] = {}
+    for drv, spec in input_drvs.items():
+        match spec:
+            case list():
+                outputs = spec
+            case dict():
+                outputs = spec.get("outputs", [])
+            case _:
+                raise ValueError("inputDrvs entry is not a list or dict")
+        if not isinstance(outputs, list):
+            raise ValueError("inputDrvs outputs is not a list")
+        drv_map[absolute_store_path(drv)] = [
+            output for output in outputs if isinstance(output, str)
+        ]
+    return drv_map
+
+
+def parse_input_srcs(drv_info: dict[str, object]):
+    """Inputs: single derivation json. Outputs: list of input sources.
+
+    Side effects: None.
+    Exceptions: Raises ValueError on unsupported format.
+    """
+    input_srcs = drv_info.get("inputSrcs", [])
+    if not isinstance(input_srcs, list):
+        raise ValueError("inputSrcs is not a list")
+    return [absolute_store_path(src) for src in input_srcs if isinstance(src, str)]
+
+
+def parse_output_paths(drv_info: dict[str, object]):
+    """Inputs: single derivation json. Outputs: map of output name to path.
+
+    Side effects: None.
+    Exceptions: None.
+    """
+    outputs = drv_info.get("outputs", {})
+    if not isinstance(outputs, dict):
+        return {}
+    path_map: dict[str, str] = {}
+    for name, output in outputs.items():
+        if isinstance(output, dict) and isinstance(output.get("path"), str):
+            path_map[name] = absolute_store_path(output["path"])
+    return path_map
+
+
 def build_title(
     pname: str | None,
     version: str | None,
@@ -226,6 +305,29 @@ def load_path_info(store_path: Path, run: CommandRunner):
     return parse_path_info_json(raw)
 
 
+def load_closure_info(paths: Sequence[str], run: CommandRunner):
+    """Inputs: paths, runner. Outputs: path info map for the joint closure.
+
+    Side effects: Runs nix path-info.
+    Exceptions: Raises RuntimeError on command failure.
+    """
+    if not paths:
+        return {}
+    output = run(
+        [
+            "nix",
+            "path-info",
+            "--recursive",
+            "--json",
+            "--size",
+            "--closure-size",
+            *paths,
+        ]
+    )
+    raw = json.loads(output)
+    return parse_path_info_json(raw)
+
+
 def chunk_paths(paths: Sequence[str], size: int):
     """Inputs: paths, size. Outputs: list chunks.
 
@@ -284,6 +386,34 @@ def load_derivations(drv_paths: list[str], run: CommandRunner):
     return json.loads(output)
 
 
+def lookup_derivation(data: dict[str, object], drv_path: str):
+    """Inputs: derivation show data, drv path. Outputs: derivation json.
+
+    Side effects: None.
+    Exceptions: Raises ValueError when the derivation is missing.
+    """
+    # Newer nix emits keys without the store directory.
+    for key in (drv_path, drv_path.removeprefix("/nix/store/")):
+        drv_info = data.get(key)
+        if isinstance(drv_info, dict):
+            return drv_info
+    raise ValueError(f"derivation missing from output: {drv_path}")
+
+
+def resolve_drv(value: str, run: CommandRunner):
+    """Inputs: drv or output path, runner. Outputs: drv path.
+
+    Side effects: Runs nix-store when given an output path.
+    Exceptions: Raises ValueError when the deriver is unknown.
+    """
+    if value.endswith(".drv"):
+        return value
+    drv = load_derivers([value], run)[value]
+    if drv is None:
+        raise ValueError(f"no known deriver for {value}")
+    return drv
+
+
 def title_map_for_paths(paths: list[str], run: CommandRunner):
     """Inputs: paths, runner. Outputs: title map by output path.
 
@@ -297,6 +427,18 @@ def title_map_for_paths(paths: list[str], run: CommandRunner):
     return parse_derivation_json(derivation_data)
 
 
+def store_name(path: str):
+    """Inputs: store path. Outputs: name without the hash prefix.
+
+    Side effects: None.
+    Exceptions: None.
+
+    Example:
+        store_name("/nix/store/aaaaa-foo-1.0")
+    """
+    return path.rsplit("/", 1)[-1].split("-", 1)[-1]
+
+
 def human_size(value: int | None):
     """Inputs: value in bytes. Outputs: human friendly size.
 
@@ -348,17 +490,12 @@ def class_for_size(size: int | None, low: int, high: int):
     return "sizeRed"
 
 
-def generate_mermaid(store_path: Path, run: CommandRunner = run_command):
-    """Inputs: store_path, runner. Outputs: mermaid string.
-
-    Side effects: Runs nix commands.
-    Exceptions: Raises RuntimeError on command failure.
+def render_mermaid(path_info: dict[str, PathInfo], title_map: dict[str, str]):
+    """Inputs: path info map, title map. Outputs: mermaid string.
 
-    Example:
-        generate_mermaid(Path("/nix/store/hash-name"), run_command)
+    Side effects: None.
+    Exceptions: Raises ValueError when no closure sizes are known.
     """
-    path_info = load_path_info(store_path, run)
-    title_map = title_map_for_paths(list(path_info.keys()), run)
     closure_sizes = [
         info.closure_size
         for info in path_info.values()
@@ -383,6 +520,8 @@ def generate_mermaid(store_path: Path, run: CommandRunner = run_command):
             f"size {human_size(info.nar_size)}\\n"
             f"closure {human_size(info.closure_size)}"
         )
+        if info.file_size is not None:
+            label = f"{label}\\ndownload {human_size(info.file_size)}"
         label = label.replace('"', "'")
         node_id = node_ids[path]
         lines.append(f'{node_id}["{label}"]')
@@ -395,36 +534,123 @@ def generate_mermaid(store_path: Path, run: CommandRunner = run_command):
     return "\n".join(lines)
 
 
-@app.command()
-def main(store_path: str):
-    """Inputs: store_path argument. Outputs: mermaid on stdout.
+def generate_mermaid(store_path: Path, run: CommandRunner = run_command):
+    """Inputs: store_path, runner. Outputs: mermaid string.
+
+    Side effects: Runs nix commands.
+    Exceptions: Raises RuntimeError on command failure.
+
+    Example:
+        generate_mermaid(Path("/nix/store/hash-name"), run_command)
+    """
+    path_info = load_path_info(store_path, run)
+    title_map = title_map_for_paths(list(path_info.keys()), run)
+    return render_mermaid(path_info, title_map)
+
 
-    Side effects: Runs nix commands and writes to stdout.
+def main(store_path: str, cache: Path | None = None):
+    """Inputs: store_path argument, optional file:// cache dir.
+
+    Outputs: mermaid on stdout.
+    Side effects: Runs nix commands, or reads narinfo files from cache.
     Exceptions: Raises typer.Exit on invalid input.
     """
+    if cache is not None:
+        # Imported here since binary_cache builds on this module.
+        from nix_seed_tools.binary_cache import generate_cache_mermaid
+
+        try:
+            mermaid = generate_cache_mermaid(cache, store_path)
+        except ValueError as exc:
+            log_event("error", "invalid binary cache", error=str(exc))
+            import typer
+
+            raise typer.Exit(code=2) from exc
+        sys.stdout.write(mermaid + "\n")
+        return
     try:
         resolved = resolve_store_path(store_path)
     except ValueError as exc:
         log_event("error", "invalid store path", error=str(exc))
+        import typer
+
         raise typer.Exit(code=2) from exc
     mermaid = generate_mermaid(resolved, run_command)
     sys.stdout.write(mermaid + "\n")
 
 
+def build_app():
+    """Inputs: None. Outputs: typer app wrapping main.
+
+    Side effects: Imports typer.
+    Exceptions: None.
+    """
+    import typer
+
+    typer_app = typer.Typer(add_completion=False)
+    typer_app.command()(main)
+    return typer_app
+
+
+def __getattr__(name: str):
+    """Inputs: attribute name. Outputs: the typer app for `app`.
+
+    Side effects: Builds and caches the typer app on first access.
+    Exceptions: Raises AttributeError for other names.
+    """
+    if name == "app":
+        typer_app = globals()["app"] = build_app()
+        return typer_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def cli(argv: Sequence[str] | None = None):
+    """Inputs: argv, defaulting to sys.argv. Outputs: None.
+
+    Side effects: Runs main directly for the common single store path
+    call, and hands anything else (options, --help) to the typer app.
+    Exceptions: Raises SystemExit with the command exit code.
+    """
+    args = list(sys.argv[1:] if argv is None else argv)
+    if len(args) == 1 and not args[0].startswith("-"):
+        try:
+            main(args[0])
+        except Exception as exc:
+            import typer
+
+            if isinstance(exc, typer.Exit):
+                raise SystemExit(exc.exit_code) from exc
+            raise
+        return
+    build_app()(args)
+
+
 log_event.__annotations__["return"] = None
 parse_path_info_json.__annotations__["return"] = dict[str, PathInfo]
+absolute_store_path.__annotations__["return"] = str
 parse_derivation_json.__annotations__["return"] = dict[str, str]
 resolve_store_path.__annotations__["return"] = Path
 run_command.__annotations__["return"] = str
 coerce_int.__annotations__["return"] = int | None
+parse_input_drvs.__annotations__["return"] = dict[str, list[str]]
+parse_input_srcs.__annotations__["return"] = list[str]
+parse_output_paths.__annotations__["return"] = dict[str, str]
 build_title.__annotations__["return"] = str
 load_path_info.__annotations__["return"] = dict[str, PathInfo]
+load_closure_info.__annotations__["return"] = dict[str, PathInfo]
 chunk_paths.__annotations__["return"] = list[list[str]]
 load_derivers.__annotations__["return"] = dict[str, str | None]
 load_derivations.__annotations__["return"] = dict[str, object]
+lookup_derivation.__annotations__["return"] = dict[str, object]
+resolve_drv.__annotations__["return"] = str
 title_map_for_paths.__annotations__["return"] = dict[str, str]
+store_name.__annotations__["return"] = str
 human_size.__annotations__["return"] = str
 quantile_thresholds.__annotations__["return"] = tuple[int, int]
 class_for_size.__annotations__["return"] = str
+render_mermaid.__annotations__["return"] = str
 generate_mermaid.__annotations__["return"] = str
 main.__annotations__["return"] = None
+build_app.__annotations__["return"] = "typer.Typer"
+__getattr__.__annotations__["return"] = object
+cli.__annotations__["return"] = None
@@ -0,0 +1,398 @@
+"""OCI image layer analysis mapping layers to store paths."""
+from __future__ import annotations
+
+import gzip
+import json
+import re
+import sys
+import tarfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Annotated, Sequence
+
+import typer
+
+from nix_seed_tools.nix_path_mermaid import log_event
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Digest grammar from the OCI image spec.
+DIGEST_PATTERN = re.compile(r"[a-z0-9]+(?:[+._-][a-z0-9]+)*:[a-zA-Z0-9=_-]+")
+
+# A single registry connection rarely fills a fast link, which is why
+# clients pull layers in parallel. Without a per-stream cap the estimate
+# collapses to size / bandwidth and concurrency has no effect.
+DEFAULT_STREAM_BANDWIDTH_MIB = 32.0
+
+
+@dataclass(frozen=True)
+class LayerInfo:
+    digest: str
+    media_type: str
+    compressed_size: int
+    uncompressed_size: int
+    paths: list[str]
+
+
+app = typer.Typer(add_completion=False)
+
+
+class CountingReader:
+    """Counts bytes read through a binary stream."""
+
+    def __init__(self, stream: IO[bytes]):
+        self.stream = stream
+        self.count = 0
+
+    def read(self, size: int = -1):
+        data = self.stream.read(size)
+        self.count += len(data)
+        return data
+
+
+def store_path_for_member(name: str):
+    """Inputs: tar member name. Outputs: store path or None.
+
+    Side effects: None.
+    Exceptions: None.
+
+    Example:
+        store_path_for_member("nix/store/aaaaa-foo/bin/foo")
+    """
+    parts = [part for part in name.split("/") if part not in ("", ".")]
+    if len(parts) < 3 or parts[:2] != ["nix", "store"]:
+        return None
+    return f"/nix/store/{parts[2]}"
+
+
+def scan_layer(blob: Path):
+    """Inputs: layer blob path. Outputs: store paths, uncompressed size.
+
+    Side effects: Streams the blob, reading tar headers only.
+    Exceptions: Raises ValueError when the blob is not a (gzip) tar.
+    """
+    with blob.open("rb") as raw:
+        compressed = raw.read(2) == GZIP_MAGIC
+        raw.seek(0)
+        stream: IO[bytes] = gzip.GzipFile(fileobj=raw) if compressed else raw
+        reader = CountingReader(stream)
+        paths: set[str] = set()
+        try:
+            with tarfile.open(fileobj=reader, mode="r|") as tar:
+                for member in tar:
+                    path = store_path_for_member(member.name)
+                    if path is not None:
+                        paths.add(path)
+            # Drain the end-of-archive padding so the size is exact.
+            reader.read()
+        except (tarfile.TarError, OSError) as exc:
+            raise ValueError(f"layer is not a tar archive: {blob.name}") from exc
+    # Sort for deterministic output, which is worth O(n log n) here.
+    return sorted(paths), reader.count
+
+
+def blob_path(layout: Path, digest: str):
+    """Inputs: OCI layout dir, digest. Outputs: blob path.
+
+    Side effects: None.
+    Exceptions: Raises ValueError on a malformed digest.
+    """
+    if not DIGEST_PATTERN.fullmatch(digest):
+        raise ValueError(f"malformed digest: {digest}")
+    algorithm, _sep, encoded = digest.partition(":")
+    return layout / "blobs" / algorithm / encoded
+
+
+def load_json(path: Path):
+    """Inputs: json file path. Outputs: parsed json.
+
+    Side effects: Reads a file.
+    Exceptions: Raises ValueError when the file is missing or invalid.
+    """
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError as exc:
+        raise ValueError(f"file missing: {path}") from exc
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"invalid json: {path}") from exc
+
+
+def platform_name(descriptor: dict[str, object]):
+    """Inputs: index descriptor. Outputs: os/architecture[/variant] or None.
+
+    Side effects: None.
+    Exceptions: None.
+
+    Example:
+        platform_name({"platform": {"os": "linux", "architecture": "arm64"}})
+    """
+    platform = descriptor.get("platform")
+    if not isinstance(platform, dict):
+        return None
+    parts = [platform.get(key) for key in ("os", "architecture", "variant")]
+    return "/".join(part for part in parts if isinstance(part, str) and part)
+
+
+def select_manifest(manifests: list[object], platform: str | None):
+    """Inputs: index manifests, wanted platform. Outputs: descriptor.
+
+    Side effects: None.
+    Exceptions: Raises ValueError when no single manifest matches.
+
+    A multi-platform index needs a platform; guessing would analyse an
+    arbitrary system's seed.
+    """
+    descriptors = [item for item in manifests if isinstance(item, dict)]
+    if platform is not None:
+        descriptors = [
+            item for item in descriptors if platform_name(item) in (platform, None)
+        ]
+    if len(descriptors) > 1:
+        # Sort for deterministic output, which is worth O(n log n) here.
+        names = sorted(str(platform_name(item)) for item in descriptors)
+        raise ValueError(
+            f"index has {len(descriptors)} manifests ({', '.join(names)}), "
+            "pick one with --platform"
+        )
+    if not descriptors:
+        raise ValueError(f"index has no manifest for {platform}")
+    return descriptors[0]
+
+
+def resolve_manifest(layout: Path, platform: str | None = None):
+    """Inputs: OCI layout dir, optional os/architecture platform.
+
+    Outputs: image manifest json.
+    Side effects: Reads index and manifest blobs.
+    Exceptions: Raises ValueError when no single manifest is found.
+    """
+    document = load_json(layout / "index.json")
+    # Follow nested indexes down to the selected image manifest.
+    while isinstance(document, dict) and "layers" not in document:
+        manifests = document.get("manifests")
+        if not isinstance(manifests, list) or not manifests:
+            raise ValueError("index has no manifests")
+        descriptor = select_manifest(manifests, platform)
+        if not isinstance(descriptor.get("digest"), str):
+            raise ValueError("manifest descriptor has no digest")
+        document = load_json(blob_path(layout, descriptor["digest"]))
+    if not isinstance(document, dict) or not isinstance(document["layers"], list):
+        raise ValueError("manifest layers is not a list")
+    return document
+
+
+def load_oci_layout(layout: Path, platform: str | None = None):
+    """Inputs: OCI layout dir, optional platform. Outputs: list of LayerInfo.
+
+    Side effects: Reads manifest and streams layer blobs.
+    Exceptions: Raises ValueError on unsupported layout.
+    """
+    layers: list[LayerInfo] = []
+    for descriptor in resolve_manifest(layout, platform)["layers"]:
+        if not isinstance(descriptor, dict) or not isinstance(
+            descriptor.get("digest"), str
+        ):
+            raise ValueError("layer descriptor has no digest")
+        blob = blob_path(layout, descriptor["digest"])
+        if not blob.is_file():
+            raise ValueError(f"layer blob missing: {descriptor['digest']}")
+        paths, uncompressed = scan_layer(blob)
+        layers.append(
+            LayerInfo(
+                digest=descriptor["digest"],
+                media_type=str(descriptor.get("mediaType", "")),
+                compressed_size=blob.stat().st_size,
+                uncompressed_size=uncompressed,
+                paths=paths,
+            )
+        )
+    return layers
+
+
+def load_nix2container(image_json: Path):
+    """Inputs: nix2container image json. Outputs: list of LayerInfo.
+
+    Side effects: Reads a file.
+    Exceptions: Raises ValueError on unsupported format.
+
+    nix2container layers are uncompressed tars listing their store paths,
+    so no blob needs to be read.
+    """
+    raw = load_json(image_json)
+    if not isinstance(raw, dict) or not isinstance(raw.get("layers"), list):
+        raise ValueError("nix2container json has no layers list")
+    layers: list[LayerInfo] = []
+    for layer in raw["layers"]:
+        if not isinstance(layer, dict) or not isinstance(layer.get("digest"), str):
+            raise ValueError("layer has no digest")
+        size = layer.get("size")
+        if not isinstance(size, int):
+            raise ValueError("layer size is not an int")
+        paths = {
+            entry["path"]
+            for entry in layer.get("paths", [])
+            if isinstance(entry, dict) and isinstance(entry.get("path"), str)
+        }
+        layers.append(
+            LayerInfo(
+                digest=layer["digest"],
+                media_type=str(layer.get("mediatype", "")),
+                compressed_size=size,
+                uncompressed_size=size,
+                paths=sorted(paths),
+            )
+        )
+    return layers
+
+
+def split_paths(layers: Sequence[LayerInfo]):
+    """Inputs: layers. Outputs: map of store path to layer digests.
+
+    Side effects: None.
+    Exceptions: None.
+
+    Only paths present in more than one layer are returned.
+    """
+    owners: dict[str, list[str]] = {}
+    for layer in layers:
+        for path in layer.paths:
+            owners.setdefault(path, []).append(layer.digest)
+    return {path: digests for path, digests in owners.items() if len(digests) > 1}
+
+
+def estimate_pull_seconds(
+    sizes: Sequence[int],
+    bandwidth: float,
+    concurrency: int,
+    stream_bandwidth: float | None = None,
+):
+    """Inputs: compressed layer sizes, bytes per second, concurrency,
+    per-stream cap in bytes per second.
+
+    Outputs: estimated wall-clock seconds to pull all layers.
+    Side effects: None.
+    Exceptions: Raises ValueError on non-positive bandwidth or concurrency.
+
+    Up to `concurrency` layers download at once, taken in manifest order
+    as registry clients do. The active streams share the bandwidth
+    equally, each capped at stream_bandwidth when given, and a finished
+    stream hands its share back to the others. Without a cap the result
+    is sum(sizes) / bandwidth; with one, a single oversized layer that
+    cannot use the whole link dominates.
+    """
+    if bandwidth <= 0 or concurrency <= 0:
+        raise ValueError("bandwidth and concurrency must be positive")
+    if stream_bandwidth is not None and stream_bandwidth <= 0:
+        raise ValueError("stream bandwidth must be positive")
+    queued = list(reversed(sizes))
+    active: list[float] = []
+    elapsed = 0.0
+    while active or queued:
+        while queued and len(active) < concurrency:
+            active.append(queued.pop())
+        rate = bandwidth / len(active)
+        if stream_bandwidth is not None:
+            rate = min(rate, stream_bandwidth)
+        # Advance to the next stream finishing; the others keep their rest.
+        step = min(active)
+        elapsed += step / rate
+        active = [remaining - step for remaining in active if remaining > step]
+    return elapsed
+
+
+def layer_report(
+    layers: Sequence[LayerInfo],
+    bandwidth: float,
+    concurrency: int,
+    stream_bandwidth: float | None = None,
+):
+    """Inputs: layers, bytes per second, concurrency, per-stream cap.
+
+    Outputs: report dict.
+
+    Side effects: None.
+    Exceptions: Raises ValueError on invalid bandwidth or concurrency.
+    """
+    sizes = [layer.compressed_size for layer in layers]
+    return {
+        "layers": [
+            {
+                "digest": layer.digest,
+                "mediaType": layer.media_type,
+                "compressedSize": layer.compressed_size,
+                "uncompressedSize": layer.uncompressed_size,
+                "paths": layer.paths,
+            }
+            for layer in layers
+        ],
+        "compressedSize": sum(sizes),
+        "uncompressedSize": sum(layer.uncompressed_size for layer in layers),
+        "splitPaths": split_paths(layers),
+        "pull": {
+            "bandwidth": bandwidth,
+            "concurrency": concurrency,
+            "streamBandwidth": stream_bandwidth,
+            "seconds": estimate_pull_seconds(
+                sizes, bandwidth, concurrency, stream_bandwidth
+            ),
+        },
+    }
+
+
+def load_layers(image: Path, platform: str | None = None):
+    """Inputs: OCI layout dir or nix2container json, optional platform.
+
+    Outputs: layers.
+    Side effects: Reads image files.
+    Exceptions: Raises ValueError on unsupported input.
+    """
+    if image.is_dir():
+        return load_oci_layout(image, platform)
+    return load_nix2container(image)
+
+
+@app.command()
+def main(
+    image: Path,
+    bandwidth_mib: Annotated[float, typer.Option("--bandwidth-mib")] = 100.0,
+    concurrency: Annotated[int, typer.Option("--concurrency")] = 3,
+    stream_bandwidth_mib: Annotated[
+        float, typer.Option("--stream-bandwidth-mib")
+    ] = DEFAULT_STREAM_BANDWIDTH_MIB,
+    platform: Annotated[str | None, typer.Option("--platform")] = None,
+):
+    """Inputs: OCI layout dir or nix2container json, link bandwidth,
+    concurrency, per-connection bandwidth, os/architecture platform for a
+    multi-platform index. Outputs: json report.
+
+    Side effects: Reads image files and writes to stdout.
+    Exceptions: Raises typer.Exit on invalid input.
+    """
+    try:
+        report = layer_report(
+            load_layers(image, platform),
+            bandwidth_mib * 1024 * 1024,
+            concurrency,
+            stream_bandwidth_mib * 1024 * 1024,
+        )
+    except ValueError as exc:
+        log_event("error", "invalid image", error=str(exc))
+        raise typer.Exit(code=2) from exc
+    sys.stdout.write(json.dumps(report, indent=2) + "\n")
+
+
+CountingReader.read.__annotations__["return"] = bytes
+store_path_for_member.__annotations__["return"] = str | None
+scan_layer.__annotations__["return"] = tuple[list[str], int]
+blob_path.__annotations__["return"] = Path
+load_json.__annotations__["return"] = object
+platform_name.__annotations__["return"] = str | None
+select_manifest.__annotations__["return"] = dict[str, object]
+resolve_manifest.__annotations__["return"] = dict[str, object]
+load_oci_layout.__annotations__["return"] = list[LayerInfo]
+load_nix2container.__annotations__["return"] = list[LayerInfo]
+split_paths.__annotations__["return"] = dict[str, list[str]]
+estimate_pull_seconds.__annotations__["return"] = float
+layer_report.__annotations__["return"] = dict[str, object]
+load_layers.__annotations__["return"] = list[LayerInfo]
+main.__annotations__["return"] = None
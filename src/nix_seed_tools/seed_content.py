@@ -0,0 +1,302 @@
+"""Seed content analysis for the `nix develop --command true` benchmark."""
+from __future__ import annotations
+
+import fnmatch
+import json
+import sys
+from pathlib import Path
+from typing import Annotated, Iterable, Sequence
+
+import typer
+
+from nix_seed_tools.nix_path_mermaid import (
+    CommandRunner,
+    PathInfo,
+    absolute_store_path,
+    load_closure_info,
+    load_derivations,
+    load_path_info,
+    log_event,
+    lookup_derivation,
+    parse_input_drvs,
+    parse_input_srcs,
+    parse_output_paths,
+    resolve_drv,
+    resolve_store_path,
+    run_command,
+    store_name,
+)
+
+# Store name globs for what mkSeed ships on purpose, whatever the dev shell
+# needs: nix and its fetchers, the debug shell, the GitHub runner support
+# (stdenv.cc.cc.lib, glibc, nodejs and the `setup` link farm) and the
+# attest-and-sign post-build hook from config.Env.
+DEFAULT_KEEP = (
+    "nix-*",
+    "busybox-*",
+    "cacert-*",
+    "gcc-*-lib",
+    "glibc-*",
+    "nodejs-*",
+    "setup",
+    "attest-and-sign",
+)
+
+# The self package attributes mkSeed copies into the seed (see mkseed.nix).
+DECLARED_INPUTS = (
+    "buildInputs",
+    "nativeBuildInputs",
+    "propagatedBuildInputs",
+    "propagatedNativeBuildInputs",
+)
+
+app = typer.Typer(add_completion=False)
+
+
+def required_roots(shell_drv: str, run: CommandRunner):
+    """Inputs: dev shell drv path, runner. Outputs: required input paths.
+
+    Side effects: Runs nix derivation show.
+    Exceptions: Raises ValueError on unsupported derivation json.
+    """
+    shell_info = lookup_derivation(load_derivations([shell_drv], run), shell_drv)
+    input_drvs = parse_input_drvs(shell_info)
+    roots = set(parse_input_srcs(shell_info))
+    # Sort for deterministic command input, which is worth O(n log n) here.
+    input_data = load_derivations(sorted(input_drvs), run)
+    for drv, outputs in input_drvs.items():
+        output_paths = parse_output_paths(lookup_derivation(input_data, drv))
+        for output in outputs:
+            if output not in output_paths:
+                raise ValueError(f"output {output} missing from {drv}")
+            roots.add(output_paths[output])
+    return sorted(roots)
+
+
+def parse_declared_inputs(drv_info: dict[str, object]):
+    """Inputs: single derivation json. Outputs: declared input paths.
+
+    Side effects: None.
+    Exceptions: Raises ValueError on unsupported format.
+
+    The input attributes reach the environment as space-separated output
+    paths, or as lists in __json with structured attrs.
+    """
+    env = drv_info.get("env", {})
+    if not isinstance(env, dict):
+        raise ValueError("env is not a dict")
+    if isinstance(env.get("__json"), str):
+        try:
+            env = json.loads(env["__json"])
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"invalid structured attrs: {exc}") from exc
+        if not isinstance(env, dict):
+            raise ValueError("structured attrs are not a dict")
+    paths: set[str] = set()
+    for attr in DECLARED_INPUTS:
+        value = env.get(attr, [])
+        items = value.split() if isinstance(value, str) else value
+        if not isinstance(items, list):
+            raise ValueError(f"{attr} is not a list")
+        paths.update(
+            absolute_store_path(item) for item in items if isinstance(item, str)
+        )
+    return sorted(paths)
+
+
+def self_contributions(self_drvs: Sequence[str], run: CommandRunner):
+    """Inputs: self package drv paths, runner.
+
+    Outputs: map of self drv to the input paths it adds to the seed.
+    Side effects: Runs nix derivation show.
+    Exceptions: Raises ValueError on unsupported derivation json.
+
+    mkSeed adds only the declared inputs of each self package, check and
+    app, so those are what selfFilter removes with it. stdenv, the
+    builder and the sources stay out, since the seed does not get them
+    from the package.
+    """
+    # Sort for deterministic command input, which is worth O(n log n) here.
+    data = load_derivations(sorted(self_drvs), run)
+    return {
+        drv: parse_declared_inputs(lookup_derivation(data, drv)) for drv in self_drvs
+    }
+
+
+def closure_within(roots: Iterable[str], path_info: dict[str, PathInfo]):
+    """Inputs: root paths, path info map. Outputs: reachable paths.
+
+    Side effects: None.
+    Exceptions: None.
+    """
+    seen: set[str] = set()
+    stack = [root for root in roots if root in path_info]
+    while stack:
+        path = stack.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        stack.extend(ref for ref in path_info[path].references if ref in path_info)
+    return seen
+
+
+def total_size(paths: Iterable[str], path_info: dict[str, PathInfo]):
+    """Inputs: paths, path info map. Outputs: summed nar size in bytes.
+
+    Side effects: None.
+    Exceptions: None.
+    """
+    return sum(path_info[path].nar_size or 0 for path in paths)
+
+
+def analyze_seed(
+    seed_root: str,
+    seed_info: dict[str, PathInfo],
+    required_info: dict[str, PathInfo],
+    keep: Sequence[str] = DEFAULT_KEEP,
+    contributions: dict[str, list[str]] | None = None,
+):
+    """Inputs: seed root, seed and required path info, keep globs, self
+    package contributions.
+
+    Outputs: report dict with droppable bytes, droppable roots and the
+    self packages a selfFilter could exclude.
+    Side effects: None.
+    Exceptions: None.
+
+    Example:
+        analyze_seed("/nix/store/a-seed", seed_info, required_info)
+    """
+    kept_roots = [
+        path
+        for path in seed_info
+        if any(fnmatch.fnmatchcase(store_name(path), pattern) for pattern in keep)
+    ]
+    kept = closure_within(kept_roots, seed_info)
+    needed = set(required_info) | kept | {seed_root}
+    droppable = set(seed_info) - needed
+    referenced = {
+        ref
+        for path in droppable
+        for ref in seed_info[path].references
+        if ref != path
+    }
+    contributions = contributions or {}
+    # selfFilter sees drv.name, which is the drv store name without .drv.
+    names = {drv: store_name(drv).removesuffix(".drv") for drv in contributions}
+    contributors: dict[str, list[str]] = {}
+    for drv, paths in contributions.items():
+        for path in paths:
+            contributors.setdefault(path, []).append(names[drv])
+    # Sort for deterministic output, which is worth O(n log n) here.
+    droppable_roots = [
+        {
+            "name": store_name(path),
+            "path": path,
+            "bytes": total_size(
+                closure_within([path], seed_info) & droppable, seed_info
+            ),
+            "contributedBy": sorted(contributors.get(path, [])),
+        }
+        for path in sorted(droppable - referenced, key=store_name)
+    ]
+    self_filter: list[dict[str, object]] = []
+    for drv in sorted(contributions, key=names.__getitem__):
+        shipped = [path for path in contributions[drv] if path in seed_info]
+        # Excluding a package only helps when all it ships is droppable.
+        if shipped and all(path in droppable for path in shipped):
+            self_filter.append(
+                {
+                    "name": names[drv],
+                    "drv": drv,
+                    "bytes": total_size(
+                        closure_within(shipped, seed_info) & droppable, seed_info
+                    ),
+                }
+            )
+    return {
+        "seed": seed_root,
+        "seedBytes": total_size(seed_info, seed_info),
+        "requiredBytes": total_size(required_info, required_info),
+        "droppableBytes": total_size(droppable, seed_info),
+        "droppable": sorted(
+            (
+                {"path": path, "narSize": seed_info[path].nar_size}
+                for path in droppable
+            ),
+            key=lambda item: (-(item["narSize"] or 0), item["path"]),
+        ),
+        "missing": sorted(set(required_info) - set(seed_info)),
+        "droppableRoots": droppable_roots,
+        "selfFilter": self_filter,
+    }
+
+
+def seed_content_report(
+    shell: str,
+    seed_root: Path,
+    run: CommandRunner = run_command,
+    keep: Sequence[str] = DEFAULT_KEEP,
+    self_paths: Sequence[str] = (),
+):
+    """Inputs: dev shell path, seed root, runner, keep globs, self package
+    drv or output paths.
+
+    Outputs: report dict, see analyze_seed.
+    Side effects: Runs nix commands.
+    Exceptions: Raises RuntimeError on command failure.
+    """
+    shell_drv = resolve_drv(shell, run)
+    required_info = load_closure_info(required_roots(shell_drv, run), run)
+    seed_info = load_path_info(seed_root, run)
+    contributions = self_contributions(
+        [resolve_drv(path, run) for path in self_paths], run
+    )
+    report = analyze_seed(str(seed_root), seed_info, required_info, keep, contributions)
+    return {"shell": shell_drv, **report}
+
+
+@app.command()
+def main(
+    shell: str,
+    seed: str,
+    keep: Annotated[list[str] | None, typer.Option("--keep")] = None,
+    self_paths: Annotated[list[str] | None, typer.Option("--self")] = None,
+):
+    """Inputs: dev shell drv or output, seed image path, keep globs, self
+    package drv or output paths.
+
+    Outputs: json report on stdout.
+
+    Side effects: Runs nix commands and writes to stdout.
+    Exceptions: Raises typer.Exit on invalid input.
+    """
+    try:
+        resolved_shell = resolve_store_path(shell)
+        resolved_seed = resolve_store_path(seed)
+        resolved_self = [str(resolve_store_path(path)) for path in self_paths or []]
+    except ValueError as exc:
+        log_event("error", "invalid store path", error=str(exc))
+        raise typer.Exit(code=2) from exc
+    try:
+        report = seed_content_report(
+            str(resolved_shell),
+            resolved_seed,
+            run_command,
+            keep or DEFAULT_KEEP,
+            resolved_self,
+        )
+    except ValueError as exc:
+        log_event("error", "invalid derivation", error=str(exc))
+        raise typer.Exit(code=1) from exc
+    sys.stdout.write(json.dumps(report, indent=2) + "\n")
+
+
+required_roots.__annotations__["return"] = list[str]
+parse_declared_inputs.__annotations__["return"] = list[str]
+self_contributions.__annotations__["return"] = dict[str, list[str]]
+closure_within.__annotations__["return"] = set[str]
+total_size.__annotations__["return"] = int
+analyze_seed.__annotations__["return"] = dict[str, object]
+seed_content_report.__annotations__["return"] = dict[str, object]
+main.__annotations__["return"] = None
@@ -0,0 +1,260 @@
+"""Parallel n-of-m attestation quorum verification."""
+from __future__ import annotations
+
+import base64
+import binascii
+import functools
+import hashlib
+import json
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Annotated, Sequence
+
+import typer
+
+from nix_seed_tools.nix_path_mermaid import log_event
+
+
+@dataclass(frozen=True)
+class Attestation:
+    path: str
+    digest: str
+
+
+@dataclass
+class QuorumReport:
+    passed: bool
+    reason: str
+    required: int
+    total: int
+    digest: str | None = None
+    checked: int = 0
+    groups: dict[str, list[str]] = field(default_factory=dict)
+    invalid: list[str] = field(default_factory=list)
+
+
+app = typer.Typer(add_completion=False)
+
+
+@functools.lru_cache(maxsize=None)
+def subject_digest(subjects: tuple[tuple[str, str, str], ...]):
+    """Inputs: sorted (name, algorithm, digest) tuples. Outputs: digest key.
+
+    Side effects: None.
+    Exceptions: None.
+
+    Builders attesting the same outputs produce equal tuples, so the
+    canonical hash is computed once per distinct subject set.
+    """
+    if len(subjects) == 1:
+        _name, algorithm, value = subjects[0]
+        return f"{algorithm}:{value}"
+    canonical = json.dumps(subjects, separators=(",", ":"))
+    return "sha256:" + hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def statement_from_json(raw: object):
+    """Inputs: attestation json. Outputs: statement dict.
+
+    Side effects: None.
+    Exceptions: Raises ValueError on an undecodable DSSE payload.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError("attestation is not a dict")
+    payload = raw.get("payload")
+    if not isinstance(payload, str):
+        return raw
+    # DSSE envelope: the statement is the base64 payload.
+    try:
+        statement = json.loads(base64.b64decode(payload, validate=True))
+    except (binascii.Error, ValueError) as exc:
+        raise ValueError("envelope payload is not base64 json") from exc
+    if not isinstance(statement, dict):
+        raise ValueError("envelope payload is not a dict")
+    return statement
+
+
+def attestation_digest(raw: object):
+    """Inputs: attestation json. Outputs: digest key the builder attests.
+
+    Side effects: None.
+    Exceptions: Raises ValueError when no digest is present.
+
+    Example:
+        attestation_digest({"containerDigest": "sha256:abc"})
+    """
+    statement = statement_from_json(raw)
+    container_digest = statement.get("containerDigest")
+    if isinstance(container_digest, str) and container_digest:
+        return container_digest
+    subject = statement.get("subject")
+    if not isinstance(subject, list) or not subject:
+        raise ValueError("attestation has no containerDigest or subject")
+    subjects: list[tuple[str, str, str]] = []
+    for item in subject:
+        digests = item.get("digest") if isinstance(item, dict) else None
+        if not isinstance(digests, dict) or not digests:
+            raise ValueError("subject has no digest")
+        name = item.get("name")
+        for algorithm, value in digests.items():
+            subjects.append((str(name or ""), str(algorithm), str(value)))
+    # Sort so subject order does not split agreeing builders.
+    return subject_digest(tuple(sorted(subjects)))
+
+
+def load_attestation(path: Path):
+    """Inputs: attestation file path. Outputs: Attestation.
+
+    Side effects: Reads a file.
+    Exceptions: Raises ValueError on unreadable or invalid attestation.
+    """
+    try:
+        raw = json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError) as exc:
+        raise ValueError(f"unreadable attestation: {path.name}") from exc
+    return Attestation(path=str(path), digest=attestation_digest(raw))
+
+
+def decide(report: QuorumReport, strict: bool):
+    """Inputs: report so far, strict flag. Outputs: True when decided.
+
+    Side effects: Sets passed, reason and digest on the report.
+    Exceptions: None.
+
+    Strict mode matches bin/verify: every attestation must agree. The
+    non-strict n-of-m mode passes once any digest reaches the quorum.
+    """
+    if strict and report.invalid:
+        report.reason = f"invalid attestation: {report.invalid[0]}"
+        return True
+    if strict and len(report.groups) > 1:
+        report.reason = "digest mismatch across attestations"
+        return True
+    best = max(report.groups.items(), key=lambda item: len(item[1]), default=None)
+    best_count = len(best[1]) if best else 0
+    remaining = report.total - report.checked
+    if best and best_count >= report.required and (not strict or remaining == 0):
+        report.passed = True
+        report.digest = best[0]
+        report.reason = f"verified {best_count} attestations for {best[0]}"
+        return True
+    if best_count + remaining < report.required:
+        report.reason = "quorum cannot be reached"
+        return True
+    return False
+
+
+def verify_quorum(
+    files: Sequence[Path],
+    required: int,
+    strict: bool = True,
+    max_workers: int = 8,
+):
+    """Inputs: attestation files, required count, strict flag, workers.
+
+    Outputs: QuorumReport.
+    Side effects: Reads attestation files concurrently.
+    Exceptions: Raises ValueError when required is below one.
+
+    Returns as soon as the quorum is proven or cannot be reached;
+    attestations not yet loaded are cancelled.
+    """
+    if required < 1:
+        raise ValueError("required must be at least 1")
+    report = QuorumReport(
+        passed=False,
+        reason="",
+        required=required,
+        total=len(files),
+    )
+    if len(files) < required:
+        report.reason = (
+            f"insufficient attestations: found {len(files)}, need {required}"
+        )
+        return report
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    pending: set[Future[Attestation]] = set()
+    sources: dict[Future[Attestation], Path] = {}
+    for path in files:
+        future = pool.submit(load_attestation, path)
+        pending.add(future)
+        sources[future] = path
+    try:
+        # With at least one vote required, the last vote always decides.
+        while not decide(report, strict):
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                report.checked += 1
+                try:
+                    attestation = future.result()
+                except ValueError:
+                    report.invalid.append(str(sources[future]))
+                else:
+                    report.groups.setdefault(attestation.digest, []).append(
+                        attestation.path
+                    )
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return report
+
+
+def report_json(report: QuorumReport):
+    """Inputs: QuorumReport. Outputs: json serializable dict.
+
+    Side effects: None.
+    Exceptions: None.
+    """
+    return {
+        "passed": report.passed,
+        "reason": report.reason,
+        "digest": report.digest,
+        "required": report.required,
+        "total": report.total,
+        "checked": report.checked,
+        # Sort for deterministic output, which is worth O(n log n) here.
+        "groups": {
+            digest: sorted(paths) for digest, paths in sorted(report.groups.items())
+        },
+        "invalid": sorted(report.invalid),
+    }
+
+
+@app.command()
+def main(
+    attest_dir: Annotated[Path, typer.Option("-d")] = Path("attestations"),
+    required: Annotated[int, typer.Option("-r")] = 2,
+    quorum: Annotated[bool, typer.Option("--quorum")] = False,
+):
+    """Inputs: attestation dir, required count, quorum flag.
+
+    Outputs: json report on stdout.
+    Side effects: Reads attestations and writes to stdout.
+    Exceptions: Raises typer.Exit with code 1 when verification fails.
+    """
+    if not attest_dir.is_dir():
+        log_event("error", f"attestations dir missing: {attest_dir}")
+        raise typer.Exit(code=1)
+    # Sort to match the shell glob order of bin/verify.
+    files = sorted(attest_dir.glob("*.json"))
+    try:
+        report = verify_quorum(files, required, strict=not quorum)
+    except ValueError as exc:
+        log_event("error", "invalid quorum", error=str(exc))
+        raise typer.Exit(code=2) from exc
+    sys.stdout.write(json.dumps(report_json(report), indent=2) + "\n")
+    if not report.passed:
+        log_event("error", report.reason)
+        raise typer.Exit(code=1)
+    log_event("info", report.reason)
+
+
+subject_digest.__annotations__["return"] = str
+statement_from_json.__annotations__["return"] = dict[str, object]
+attestation_digest.__annotations__["return"] = str
+load_attestation.__annotations__["return"] = Attestation
+decide.__annotations__["return"] = bool
+verify_quorum.__annotations__["return"] = QuorumReport
+report_json.__annotations__["return"] = dict[str, object]
+main.__annotations__["return"] = None
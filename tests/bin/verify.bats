@@ -8,23 +8,17 @@ setup() {
   SCRIPT="${PROJECT_ROOT}/bin/verify"
 }
 
-write_jq_stub() {
-  jq() {
-    if [[ $# -lt 2 ]]; then
+write_verify_stub() {
+  nix-seed-verify() {
+    log_file="${LOG_DIR}/nix-seed-verify.log"
+    printf '%s\n' "$*" >>"$log_file"
+    if [[ -n ${VERIFY_FAIL-} ]]; then
+      printf '%s\n' "${VERIFY_FAIL}" >&2
       return 1
     fi
-    if [[ $1 == "--raw-output" ]] || [[ $1 == "-r" ]]; then
-      shift
-    fi
-    shift
-    for file in "$@"; do
-      content=$(<"$file")
-      value=${content#*\"containerDigest\":\"}
-      value=${value%%\"*}
-      printf '%s\n' "$value"
-    done
+    printf '%s\n' "verified attestations"
   }
-  export -f jq
+  export -f nix-seed-verify
 }
 
 write_oras_stub() {
@@ -97,7 +91,7 @@ make_attestations() {
   assert_output_contains "Usage:"
 }
 
-@test "verify fails without jq" {
+@test "verify fails without nix-seed-verify" {
   write_uname_stub
   write_tr_stub
   PATH=/nope run "$BASH_BIN" "$SCRIPT" "image"
@@ -107,10 +101,7 @@ make_attestations() {
 @test "verify fails without oras" {
   write_uname_stub
   write_tr_stub
-  jq() {
-    return 0
-  }
-  export -f jq
+  write_verify_stub
   PATH=/nope run "$BASH_BIN" "$SCRIPT" "image"
   assert_status 1
 }
@@ -118,42 +109,39 @@ make_attestations() {
 @test "verify requires skopeo for annotate" {
   write_uname_stub
   write_tr_stub
-  write_jq_stub
+  write_verify_stub
   write_oras_stub
   PATH=/nope run "$BASH_BIN" "$SCRIPT" "image" "-a"
   assert_status 1
 }
 
-@test "verify fails when attestation dir missing" {
-  write_jq_stub
-  write_oras_stub
-  run "$BASH_BIN" "$SCRIPT" "image" "-d" "${BATS_TEST_TMPDIR}/nope"
-  assert_status 1
-  assert_output_contains "attestations dir missing"
-}
-
-@test "verify fails with insufficient attestations" {
-  write_jq_stub
+@test "verify passes dir and required to nix-seed-verify" {
+  write_verify_stub
   write_oras_stub
   dir="${BATS_TEST_TMPDIR}/attestations"
-  make_attestations "$dir" "sha256:one"
-  run "$BASH_BIN" "$SCRIPT" "image" "-d" "$dir"
-  assert_status 1
-  assert_output_contains "insufficient attestations"
+  make_attestations "$dir" "sha256:same" "sha256:same" "sha256:same"
+  run "$BASH_BIN" "$SCRIPT" "image" "-d" "$dir" "-r" "3"
+  assert_status 0
+  assert_file_contains "${LOG_DIR}/nix-seed-verify.log" "-d ${dir} -r 3"
 }
 
-@test "verify fails with digest mismatch" {
-  write_jq_stub
+@test "verify stops when the quorum fails" {
+  write_verify_stub
   write_oras_stub
   dir="${BATS_TEST_TMPDIR}/attestations"
   make_attestations "$dir" "sha256:one" "sha256:two"
-  run "$BASH_BIN" "$SCRIPT" "image" "-d" "$dir"
+  VERIFY_FAIL="digest mismatch across attestations" \
+    run "$BASH_BIN" "$SCRIPT" "image" "-d" "$dir" "-A"
   assert_status 1
   assert_output_contains "digest mismatch"
+  if [[ -f "${LOG_DIR}/oras.log" ]]; then
+    printf '%s\n' "unexpected oras call" >&2
+    return 1
+  fi
 }
 
 @test "verify skips attach by default" {
-  write_jq_stub
+  write_verify_stub
   write_oras_stub
   dir="${BATS_TEST_TMPDIR}/attestations"
   make_attestations "$dir" "sha256:same" "sha256:same"
@@ -168,7 +156,7 @@ make_attestations() {
 }
 
 @test "verify attaches when requested" {
-  write_jq_stub
+  write_verify_stub
   write_oras_stub
   dir="${BATS_TEST_TMPDIR}/attestations"
   make_attestations "$dir" "sha256:same" "sha256:same"
@@ -186,7 +174,7 @@ make_attestations() {
 }
 
 @test "verify skips attach on dry run" {
-  write_jq_stub
+  write_verify_stub
   write_oras_stub
   dir="${BATS_TEST_TMPDIR}/attestations"
   make_attestations "$dir" "sha256:same" "sha256:same"
@@ -200,7 +188,7 @@ make_attestations() {
 }
 
 @test "verify annotates with overrides" {
-  write_jq_stub
+  write_verify_stub
   write_oras_stub
   write_skopeo_stub
   dir="${BATS_TEST_TMPDIR}/attestations"
@@ -0,0 +1,257 @@
+import json
+from pathlib import Path
+
+import pytest
+import typer
+
+from nix_seed_tools import bench as module
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fake_runner(clock, durations):
+    """Advance the fake clock by the next duration for each command."""
+    calls = []
+
+    def run(args, input_text=None):
+        calls.append(list(args))
+        clock.now += durations.get(args[0], 0.0)
+        return ""
+
+    return run, calls
+
+
+def test_run_benchmark_cold_and_warm():
+    clock = FakeClock()
+    run, calls = fake_runner(clock, {"prep": 2.0, "nix": 5.0})
+
+    runs = module.run_benchmark(
+        ["nix", "develop", "--command", "true"],
+        2,
+        run,
+        cold_prep=["prep"],
+        clock=clock,
+    )
+
+    assert [record["condition"] for record in runs] == ["cold", "cold", "warm", "warm"]
+    assert runs[0]["phases"] == {"prepare": 2.0, "command": 5.0}
+    assert runs[2]["phases"] == {"command": 5.0}
+    # 2 cold prep + 2 cold runs + 1 warm-up + 2 warm runs
+    assert len(calls) == 7
+
+
+def test_run_benchmark_without_cold_prep():
+    clock = FakeClock()
+    run, calls = fake_runner(clock, {"true": 1.0})
+
+    runs = module.run_benchmark(["true"], 3, run, clock=clock)
+
+    assert {record["condition"] for record in runs} == {"warm"}
+    assert len(calls) == 4
+
+
+def test_median_interval_variants():
+    with pytest.raises(ValueError):
+        module.median_interval([])
+    assert module.median_interval([3.0]) == (3.0, 3.0, 0.0)
+    # too few samples for 95%: the full range, with the coverage it has
+    assert module.median_interval([1.0, 2.0, 3.0, 4.0, 5.0]) == (1.0, 5.0, 0.9375)
+    # six samples are the fewest whose full range reaches 95%
+    assert module.median_interval([float(value) for value in range(6)])[2] >= 0.95
+    # n=10 gives the 2nd and 9th order statistics (97.9% coverage)
+    low, high, coverage = module.median_interval(
+        [float(value) for value in range(10, 0, -1)]
+    )
+    assert (low, high) == (2.0, 9.0)
+    assert coverage == pytest.approx(1 - 22 / 1024)
+
+
+def test_summarize():
+    summary = module.summarize([float(value) for value in range(1, 21)])
+
+    assert summary["n"] == 20
+    assert summary["median"] == 10.5
+    assert summary["p95"] == 19.0
+    assert summary["ciLow"] <= summary["median"] <= summary["ciHigh"]
+    assert summary["ciCoverage"] >= 0.95
+
+
+def test_summarize_runs():
+    runs = [
+        {"condition": "cold", "iteration": 0, "phases": {"prepare": 9, "command": 4}},
+        {"condition": "warm", "iteration": 0, "phases": {"command": 1}},
+        {"condition": "warm", "iteration": 1, "phases": {"command": 3}},
+    ]
+
+    summary = module.summarize_runs(runs)
+
+    assert summary["cold"]["median"] == 4
+    assert summary["warm"]["median"] == 2
+
+
+def test_compare_summaries():
+    current = {
+        "cold": {"median": 20.0, "ciLow": 18.0, "ciHigh": 22.0},
+        "warm": {"median": 5.0, "ciLow": 4.0, "ciHigh": 6.0},
+        "new": {"median": 1.0, "ciLow": 1.0, "ciHigh": 1.0},
+        "skipped": None,
+    }
+    baseline = {
+        "cold": {"median": 10.0, "ciLow": 9.0, "ciHigh": 11.0},
+        "warm": {"median": 0.0, "ciLow": 0.0, "ciHigh": 5.5},
+        "skipped": {"median": 1.0, "ciLow": 1.0, "ciHigh": 1.0},
+    }
+
+    comparison = module.compare_summaries(current, baseline)
+
+    assert comparison["cold"]["ratio"] == 2.0
+    assert comparison["cold"]["regression"] is True
+    assert comparison["warm"]["ratio"] is None
+    assert comparison["warm"]["regression"] is False
+    assert "new" not in comparison
+    assert "skipped" not in comparison
+
+
+def test_load_baseline_errors(tmp_path):
+    with pytest.raises(ValueError):
+        module.load_baseline(tmp_path / "missing.json")
+    bad = tmp_path / "bad.json"
+    bad.write_text("[]")
+    with pytest.raises(ValueError):
+        module.load_baseline(bad)
+
+
+@pytest.mark.parametrize(
+    "summary",
+    [
+        {"warm": {}},
+        {"warm": []},
+        {"warm": {"median": 1.0, "ciLow": 1.0, "ciHigh": "slow"}},
+        {"warm": {"median": True, "ciLow": 1.0, "ciHigh": 1.0}},
+    ],
+)
+def test_load_baseline_invalid_condition(tmp_path, summary):
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps({"summary": summary}))
+
+    with pytest.raises(ValueError):
+        module.load_baseline(path)
+
+
+def test_load_baseline_valid(tmp_path):
+    summary = {"warm": {"median": 5, "ciLow": 4.0, "ciHigh": 6.0, "n": 6}, "cold": None}
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps({"summary": summary}))
+
+    assert module.load_baseline(path) == summary
+
+
+@pytest.fixture
+def fake_command(monkeypatch):
+    clock = FakeClock()
+    run, calls = fake_runner(clock, {"nix": 5.0})
+    monkeypatch.setattr(module, "run_command", run)
+    monkeypatch.setattr(module.time, "perf_counter", clock)
+    return calls
+
+
+def test_main_writes_output(tmp_path, fake_command):
+    output = tmp_path / "bench.json"
+
+    module.main(iterations=2, cold_prep="rm -rf cache", output=output)
+    result = json.loads(output.read_text())
+
+    assert result["command"] == module.DEFAULT_COMMAND
+    assert result["summary"]["cold"]["median"] == 5.0
+    assert result["comparison"] == {}
+    assert result["skipped"] == {}
+    assert result["error"] is None
+    assert fake_command[0] == ["rm", "-rf", "cache"]
+
+
+def test_main_marks_cold_skipped(fake_command, capsys):
+    module.main(iterations=1)
+    captured = capsys.readouterr()
+    result = json.loads(captured.out)
+
+    assert result["summary"]["cold"] is None
+    assert result["skipped"] == {"cold": module.COLD_SKIPPED}
+    assert "cold runs skipped" in captured.err
+
+
+def test_main_keeps_timings_on_failure(monkeypatch, tmp_path, capsys):
+    clock = FakeClock()
+    run, _calls = fake_runner(clock, {"nix": 5.0})
+    timed = []
+
+    def failing(args, input_text=None):
+        # the warm-up and first warm run succeed, the second fails
+        if len(timed) == 2:
+            raise RuntimeError("nix develop failed")
+        timed.append(args)
+        return run(args, input_text)
+
+    monkeypatch.setattr(module, "run_command", failing)
+    monkeypatch.setattr(module.time, "perf_counter", clock)
+    output = tmp_path / "bench.json"
+
+    with pytest.raises(typer.Exit) as exc:
+        module.main(iterations=3, output=output)
+    captured = capsys.readouterr()
+    result = json.loads(output.read_text())
+
+    assert exc.value.exit_code == 1
+    assert result["error"] == "nix develop failed"
+    assert len(result["runs"]) == 1
+    assert result["summary"]["warm"]["median"] == 5.0
+    assert "benchmark command failed" in captured.err
+
+
+def test_main_compares_baseline(tmp_path, fake_command, capsys):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(
+        json.dumps({"summary": {"warm": {"median": 1.0, "ciLow": 1.0, "ciHigh": 1.0}}})
+    )
+
+    with pytest.raises(typer.Exit) as exc:
+        module.main(iterations=1, baseline=baseline)
+    captured = capsys.readouterr()
+
+    assert exc.value.exit_code == 1
+    assert json.loads(captured.out)["comparison"]["warm"]["ratio"] == 5.0
+    assert "setup time regression" in captured.err
+
+
+def test_main_within_baseline(tmp_path, fake_command, capsys):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(
+        json.dumps({"summary": {"warm": {"median": 5.0, "ciLow": 4.0, "ciHigh": 6.0}}})
+    )
+
+    module.main(iterations=1, baseline=baseline)
+    captured = capsys.readouterr()
+
+    assert json.loads(captured.out)["comparison"]["warm"]["regression"] is False
+
+
+def test_main_invalid_input(tmp_path, capsys):
+    with pytest.raises(typer.Exit) as exc:
+        module.main(iterations=0)
+    assert exc.value.exit_code == 2
+    with pytest.raises(typer.Exit) as exc:
+        module.main(baseline=Path(tmp_path / "missing.json"))
+    assert exc.value.exit_code == 2
+    empty = tmp_path / "empty.json"
+    empty.write_text(json.dumps({"summary": {"warm": {}}}))
+    with pytest.raises(typer.Exit) as exc:
+        module.main(baseline=empty)
+    captured = capsys.readouterr()
+
+    assert exc.value.exit_code == 2
+    assert "invalid baseline" in captured.err
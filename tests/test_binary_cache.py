@@ -0,0 +1,106 @@
+from pathlib import Path
+
+import pytest
+
+from nix_seed_tools import binary_cache as module
+
+
+FOO = "/nix/store/aaaaa-foo-1.0"
+BAR = "/nix/store/bbbbb-bar-2.0"
+BAZ = "/nix/store/ccccc-baz-3.0"
+
+NARINFOS = {
+    "aaaaa": (
+        f"StorePath: {FOO}\n"
+        "URL: nar/foo.nar.xz\n"
+        "Compression: xz\n"
+        "FileSize: 40\n"
+        "NarSize: 100\n"
+        "References: aaaaa-foo-1.0 bbbbb-bar-2.0 ccccc-baz-3.0\n"
+        "Deriver: ddddd-foo-1.0.drv\n"
+    ),
+    "bbbbb": (
+        f"StorePath: {BAR}\n"
+        "FileSize: 80\n"
+        "NarSize: 200\n"
+        "References: ccccc-baz-3.0\n"
+    ),
+    "ccccc": f"StorePath: {BAZ}\nNarSize: 50\nReferences: \n",
+}
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    for hash_part, text in NARINFOS.items():
+        (tmp_path / f"{hash_part}.narinfo").write_text(text)
+    return tmp_path
+
+
+def test_store_hash_variants():
+    assert module.store_hash(FOO) == "aaaaa"
+    with pytest.raises(ValueError):
+        module.store_hash("/tmp/aaaaa-foo")
+    with pytest.raises(ValueError):
+        module.store_hash("/nix/store/nohash")
+    with pytest.raises(ValueError):
+        module.store_hash("/nix/store/aaaaa-foo/bin/foo")
+
+
+def test_parse_narinfo_fields():
+    info = module.parse_narinfo(NARINFOS["aaaaa"] + "no separator line\n")
+
+    assert info.path == FOO
+    assert info.nar_size == 100
+    assert info.file_size == 40
+    assert info.closure_size is None
+    assert info.references == [FOO, BAR, BAZ]
+    assert info.deriver == "/nix/store/ddddd-foo-1.0.drv"
+
+
+def test_parse_narinfo_errors():
+    with pytest.raises(ValueError):
+        module.parse_narinfo("NarSize: 1\n")
+    with pytest.raises(ValueError):
+        module.parse_narinfo(f"StorePath: {FOO}\nNarSize: lots\n")
+
+
+def test_read_narinfo_errors(cache_dir):
+    with pytest.raises(ValueError):
+        module.read_narinfo(cache_dir, "/nix/store/zzzzz-missing")
+    (cache_dir / "yyyyy.narinfo").write_text(f"StorePath: {FOO}\n")
+    with pytest.raises(ValueError):
+        module.read_narinfo(cache_dir, "/nix/store/yyyyy-other")
+
+
+def test_load_cache_path_info_follows_references(cache_dir):
+    path_info = module.load_cache_path_info(cache_dir, FOO, max_workers=2)
+
+    assert set(path_info) == {FOO, BAR, BAZ}
+    assert path_info[FOO].closure_size == 350
+    assert path_info[BAR].closure_size == 250
+    assert path_info[BAZ].closure_size == 50
+    assert path_info[BAR].file_size == 80
+    assert path_info[BAZ].file_size is None
+
+
+def test_load_cache_path_info_errors(cache_dir):
+    with pytest.raises(ValueError):
+        module.load_cache_path_info(cache_dir / "missing", FOO)
+    (cache_dir / "ccccc.narinfo").unlink()
+    with pytest.raises(ValueError):
+        module.load_cache_path_info(cache_dir, FOO)
+
+
+def test_title_map_from_derivers(cache_dir):
+    path_info = module.load_cache_path_info(cache_dir, FOO)
+
+    assert module.title_map_from_derivers(path_info) == {FOO: "foo-1.0"}
+
+
+def test_generate_cache_mermaid(cache_dir):
+    output = module.generate_cache_mermaid(Path(cache_dir), FOO)
+
+    assert "graph TD" in output
+    assert "download 40 B" in output
+    assert "closure 350 B" in output
+    assert "---" in output
@@ -0,0 +1,364 @@
+import json
+import threading
+from pathlib import Path
+
+import pytest
+import typer
+
+from nix_seed_tools import closure_compare as module
+from nix_seed_tools.nix_path_mermaid import PathInfo
+
+
+X86_ROOT = "/nix/store/xr-seed-1.0"
+ARM_ROOT = "/nix/store/ar-seed-1.0"
+SOURCE = "/nix/store/src-source"
+
+PATH_INFO = {
+    X86_ROOT: [
+        {
+            "path": X86_ROOT,
+            "narSize": 10,
+            "references": ["/nix/store/xg-glibc-2.40", SOURCE],
+        },
+        {"path": "/nix/store/xg-glibc-2.40", "narSize": 300, "references": []},
+        {"path": SOURCE, "narSize": 5, "references": []},
+        {"path": "/nix/store/xs-intel-microcode-1", "narSize": 50, "references": []},
+    ],
+    ARM_ROOT: [
+        {
+            "path": ARM_ROOT,
+            "narSize": 10,
+            "references": ["/nix/store/ag-glibc-2.40", SOURCE],
+        },
+        {"path": "/nix/store/ag-glibc-2.40", "narSize": 200, "references": []},
+        {"path": SOURCE, "narSize": 5, "references": []},
+    ],
+}
+
+DERIVERS = {
+    X86_ROOT: "/nix/store/xd-seed-1.0.drv",
+    ARM_ROOT: "/nix/store/ad-seed-1.0.drv",
+    SOURCE: "/nix/store/sd-source.drv",
+}
+
+DERIVATIONS = {
+    "/nix/store/xd-seed-1.0.drv": {
+        "env": {"pname": "seed", "version": "1.0"},
+        "outputs": {"out": {"path": X86_ROOT}},
+    },
+    "/nix/store/ad-seed-1.0.drv": {
+        "env": {"pname": "seed", "version": "1.0"},
+        "outputs": {"out": {"path": ARM_ROOT}},
+    },
+    "/nix/store/sd-source.drv": {
+        "env": {"name": "source"},
+        "outputs": {"out": {"path": SOURCE}},
+    },
+}
+
+
+def make_fake_nix(calls):
+    lock = threading.Lock()
+
+    def fake_nix(args, input_text=None):
+        with lock:
+            calls.append(list(args))
+        if args[:2] == ["nix", "path-info"]:
+            return json.dumps(PATH_INFO[args[-1]])
+        if args[:3] == ["nix-store", "--query", "--deriver"]:
+            return "\n".join(DERIVERS.get(path, "unknown-deriver") for path in args[3:])
+        if args[:3] == ["nix", "derivation", "show"]:
+            wanted = input_text.split()
+            return json.dumps(
+                {key: value for key, value in DERIVATIONS.items() if key in wanted}
+            )
+        raise AssertionError("unexpected command")
+
+    return fake_nix
+
+
+def path_info(items):
+    return {
+        item["path"]: PathInfo(
+            path=item["path"],
+            nar_size=item["narSize"],
+            closure_size=None,
+            references=item["references"],
+        )
+        for item in items
+    }
+
+
+CLOSURES = {
+    "x86_64-linux": path_info(PATH_INFO[X86_ROOT]),
+    "aarch64-linux": path_info(PATH_INFO[ARM_ROOT]),
+}
+
+
+def test_title_cache_queries_each_path_once():
+    calls = []
+    cache = module.TitleCache(make_fake_nix(calls))
+
+    first = cache.lookup([X86_ROOT, SOURCE])
+    second = cache.lookup([SOURCE, "/nix/store/xg-glibc-2.40"])
+
+    assert first == {X86_ROOT: "seed 1.0", SOURCE: "source"}
+    assert second == {SOURCE: "source"}
+    deriver_queries = [args[3:] for args in calls if args[1] == "--query"]
+    assert deriver_queries == [
+        [X86_ROOT, SOURCE],
+        ["/nix/store/xg-glibc-2.40"],
+    ]
+    assert cache.lookup([SOURCE]) == {SOURCE: "source"}
+    assert len([args for args in calls if args[1] == "--query"]) == 2
+
+
+def test_title_cache_waits_for_pending_paths():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    fake_nix = make_fake_nix(calls)
+
+    def slow_nix(args, input_text=None):
+        if args[1] == "--query":
+            started.set()
+            release.wait()
+        return fake_nix(args, input_text)
+
+    cache = module.TitleCache(slow_nix)
+    results = {}
+    worker = threading.Thread(
+        target=lambda: results.update(first=cache.lookup([SOURCE]))
+    )
+    worker.start()
+    started.wait()
+    waiter = threading.Thread(
+        target=lambda: results.update(second=cache.lookup([SOURCE]))
+    )
+    waiter.start()
+    release.set()
+    worker.join()
+    waiter.join()
+
+    assert results == {"first": {SOURCE: "source"}, "second": {SOURCE: "source"}}
+    assert len([args for args in calls if args[1] == "--query"]) == 1
+
+
+def test_title_cache_releases_pending_on_error():
+    def failing(args, input_text=None):
+        raise RuntimeError("command failed")
+
+    cache = module.TitleCache(failing)
+
+    with pytest.raises(RuntimeError):
+        cache.lookup([SOURCE])
+    assert cache.pending == set()
+    assert cache.lookup([SOURCE]) == {}
+
+
+def test_parse_roots():
+    assert module.parse_roots(["x86_64-linux=./a", "aarch64-linux=./b"]) == {
+        "x86_64-linux": "./a",
+        "aarch64-linux": "./b",
+    }
+    with pytest.raises(ValueError):
+        module.parse_roots(["./a"])
+    with pytest.raises(ValueError):
+        module.parse_roots(["=./a"])
+    with pytest.raises(ValueError):
+        module.parse_roots(["x=./a", "x=./b"])
+
+
+def test_load_closures_shares_titles():
+    calls = []
+
+    closures, titles = module.load_closures(
+        {"x86_64-linux": Path(X86_ROOT), "aarch64-linux": Path(ARM_ROOT)},
+        make_fake_nix(calls),
+    )
+
+    expected = {item["path"] for item in PATH_INFO[X86_ROOT]}
+
+    assert set(closures["x86_64-linux"]) == expected
+    assert titles[ARM_ROOT] == "seed 1.0"
+    assert titles[SOURCE] == "source"
+    queried = [path for args in calls if args[1] == "--query" for path in args[3:]]
+    assert queried.count(SOURCE) == 1
+
+
+def test_align():
+    aligned = module.align(CLOSURES)
+
+    assert aligned["glibc-2.40"] == {
+        "x86_64-linux": ["/nix/store/xg-glibc-2.40"],
+        "aarch64-linux": ["/nix/store/ag-glibc-2.40"],
+    }
+    assert aligned["intel-microcode-1"] == {
+        "x86_64-linux": ["/nix/store/xs-intel-microcode-1"]
+    }
+
+
+def same_name_closures():
+    # fixed-output fetches are all named `source`
+    return {
+        "x": path_info(
+            [
+                {"path": "/nix/store/a-source", "narSize": 10, "references": []},
+                {"path": "/nix/store/b-source", "narSize": 20, "references": []},
+            ]
+        ),
+        "y": path_info(
+            [{"path": "/nix/store/c-source", "narSize": 30, "references": []}]
+        ),
+    }
+
+
+def test_align_keeps_same_name_paths_apart():
+    assert module.align(same_name_closures()) == {
+        "source": {
+            "x": ["/nix/store/a-source", "/nix/store/b-source"],
+            "y": ["/nix/store/c-source"],
+        }
+    }
+
+
+def test_compare_report_counts_same_name_paths():
+    report = module.compare_report({"x": "x", "y": "y"}, same_name_closures())
+
+    assert report["divergences"] == [
+        {
+            "name": "source",
+            "sizes": {"x": 30, "y": 30},
+            "counts": {"x": 2, "y": 1},
+            "spread": 0,
+        }
+    ]
+    assert "30 B (2)" in module.format_table(report)
+
+
+def test_compare_report():
+    roots = {"x86_64-linux": X86_ROOT, "aarch64-linux": ARM_ROOT}
+
+    report = module.compare_report(roots, CLOSURES, limit=1)
+
+    assert report["systems"]["x86_64-linux"] == {
+        "root": X86_ROOT,
+        "paths": 4,
+        "narSize": 365,
+    }
+    assert report["systems"]["aarch64-linux"]["narSize"] == 215
+    assert report["unique"] == {
+        "x86_64-linux": [{"name": "intel-microcode-1", "paths": 1, "narSize": 50}],
+        "aarch64-linux": [],
+    }
+    assert report["divergences"] == [
+        {
+            "name": "glibc-2.40",
+            "sizes": {"x86_64-linux": 300, "aarch64-linux": 200},
+            "counts": {"x86_64-linux": 1, "aarch64-linux": 1},
+            "spread": 100,
+        }
+    ]
+
+
+def test_compare_report_single_system():
+    report = module.compare_report(
+        {"x86_64-linux": X86_ROOT},
+        {"x86_64-linux": CLOSURES["x86_64-linux"]},
+    )
+
+    assert report["unique"] == {"x86_64-linux": []}
+    assert report["divergences"] == []
+
+
+def test_format_table():
+    roots = {"x86_64-linux": X86_ROOT, "aarch64-linux": ARM_ROOT}
+    table = module.format_table(module.compare_report(roots, CLOSURES))
+
+    assert table.splitlines()[1].split() == ["x86_64-linux", "4", "365", "B"]
+    assert "only in x86_64-linux: 1 paths, 50 B" in table
+    assert "only in aarch64-linux" not in table
+    assert "glibc-2.40" in table
+    assert "spread" in table
+
+
+def test_format_table_without_divergences():
+    report = module.compare_report(
+        {"x86_64-linux": X86_ROOT},
+        {"x86_64-linux": CLOSURES["x86_64-linux"]},
+    )
+
+    assert "spread" not in module.format_table(report)
+
+
+def test_combined_mermaid():
+    closures = dict(CLOSURES)
+    closures["aarch64-linux"] = {
+        **closures["aarch64-linux"],
+        # self-reference and a reference outside the closure add no edges
+        SOURCE: PathInfo(
+            path=SOURCE,
+            nar_size=5,
+            closure_size=None,
+            references=[SOURCE, "/nix/store/zz-missing"],
+        ),
+    }
+
+    output = module.combined_mermaid(closures, {X86_ROOT: "seed 1.0"})
+
+    assert output.startswith("graph TD")
+    assert "seed 1.0\\nx86_64-linux 10 B\\naarch64-linux 10 B" in output
+    assert "intel-microcode-1\\nx86_64-linux 50 B" in output
+    assert "partial" in output
+    assert output.count(" --- ") == 2
+
+
+def test_combined_mermaid_same_name_paths_not_merged():
+    closures = same_name_closures()
+    closures["x"]["/nix/store/r-root"] = PathInfo(
+        path="/nix/store/r-root",
+        nar_size=1,
+        closure_size=None,
+        references=["/nix/store/a-source", "/nix/store/b-source"],
+    )
+
+    output = module.combined_mermaid(closures, {})
+
+    # one node per source path rather than one merged `source` node
+    assert output.count('["source\\n') == 3
+    assert "source\\nx 10 B" in output
+    assert "source\\ny 30 B" in output
+    assert output.count(" --- ") == 2
+
+
+def test_main_success(monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(module, "resolve_store_path", lambda value: Path(value))
+    monkeypatch.setattr(module, "run_command", make_fake_nix([]))
+    graph = tmp_path / "graph.mmd"
+
+    module.main(
+        [f"x86_64-linux={X86_ROOT}", f"aarch64-linux={ARM_ROOT}"],
+        mermaid=graph,
+    )
+    captured = capsys.readouterr()
+
+    assert "only in x86_64-linux" in captured.out
+    assert graph.read_text().startswith("graph TD")
+
+
+def test_main_without_mermaid(monkeypatch, capsys):
+    monkeypatch.setattr(module, "resolve_store_path", lambda value: Path(value))
+    monkeypatch.setattr(module, "run_command", make_fake_nix([]))
+
+    module.main([f"x86_64-linux={X86_ROOT}"])
+
+    assert "x86_64-linux" in capsys.readouterr().out
+
+
+def test_main_invalid_root(capsys):
+    with pytest.raises(typer.Exit) as exc:
+        module.main(["no-system"])
+    captured = capsys.readouterr()
+
+    assert exc.value.exit_code == 2
+    assert "invalid root" in captured.err
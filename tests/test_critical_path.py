@@ -0,0 +1,179 @@
+import json
+from pathlib import Path
+
+import pytest
+import typer
+
+from nix_seed_tools import critical_path as module
+
+
+ROOT = "/nix/store/rrr-app-1.0.drv"
+COMPILER = "/nix/store/aaa-compiler-2.0.drv"
+DOCS = "/nix/store/bbb-docs-1.0.drv"
+LIBC = "/nix/store/ccc-libc-2.40.drv"
+
+DERIVATIONS = {
+    ROOT: {"inputDrvs": {COMPILER: {"outputs": ["out"]}, DOCS: ["out"]}},
+    # newer nix omits the store directory from keys and inputDrvs alike
+    "aaa-compiler-2.0.drv": {
+        "inputDrvs": {"ccc-libc-2.40.drv": {"outputs": ["out", "dev"]}}
+    },
+    DOCS: {"inputDrvs": {LIBC: {"outputs": ["out"]}}},
+    "ccc-libc-2.40.drv": {"inputDrvs": {}},
+}
+
+GRAPH = {ROOT: [COMPILER, DOCS], COMPILER: [LIBC], DOCS: [LIBC], LIBC: []}
+
+DURATIONS = {ROOT: 1.0, COMPILER: 10.0, DOCS: 2.0, LIBC: 5.0}
+
+
+def fake_nix(args, input_text=None):
+    if args[:4] == ["nix", "derivation", "show", "--recursive"]:
+        return json.dumps(DERIVATIONS)
+    if args[:3] == ["nix-store", "--query", "--deriver"]:
+        return ROOT + "\n"
+    raise AssertionError("unexpected command")
+
+
+def test_load_derivation_graph():
+    calls = []
+
+    def counting(args, input_text=None):
+        calls.append(args)
+        return fake_nix(args, input_text)
+
+    assert module.load_derivation_graph(ROOT, counting) == GRAPH
+    # one recursive nix derivation show for the whole graph
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        [],
+        {ROOT: "bad"},
+        {ROOT: {"inputDrvs": {COMPILER: ["out"]}}},
+        {COMPILER: {"inputDrvs": {}}},
+    ],
+)
+def test_load_derivation_graph_errors(data):
+    def fake_run(args, input_text=None):
+        return json.dumps(data)
+
+    with pytest.raises(ValueError):
+        module.load_derivation_graph(ROOT, fake_run)
+
+
+def test_drv_name():
+    assert module.drv_name(COMPILER) == "compiler-2.0"
+
+
+def test_load_timings(tmp_path):
+    path = tmp_path / "timings.json"
+    path.write_text(json.dumps({COMPILER: 10, "libc-2.40": 5.5}))
+
+    assert module.load_timings(path) == {COMPILER: 10.0, "libc-2.40": 5.5}
+
+
+@pytest.mark.parametrize("content", ["{", "[]", '{"a": "slow"}', '{"a": true}'])
+def test_load_timings_errors(tmp_path, content):
+    path = tmp_path / "timings.json"
+    path.write_text(content)
+
+    with pytest.raises(ValueError):
+        module.load_timings(path)
+    with pytest.raises(ValueError):
+        module.load_timings(tmp_path / "missing.json")
+
+
+def test_durations_for_matches_path_then_name():
+    timings = {COMPILER: 10.0, "libc-2.40": 5.0, "compiler-2.0": 99.0}
+
+    durations = module.durations_for(GRAPH, timings, default=0.5)
+
+    assert durations == {ROOT: 0.5, COMPILER: 10.0, DOCS: 0.5, LIBC: 5.0}
+
+
+def test_topological_order_inputs_first():
+    order = module.topological_order(GRAPH, ROOT)
+
+    assert order[0] == LIBC
+    assert order[-1] == ROOT
+    assert set(order) == set(GRAPH)
+
+
+def test_topological_order_direct_and_transitive_input():
+    graph = {ROOT: [LIBC, COMPILER], COMPILER: [LIBC], LIBC: []}
+
+    assert module.topological_order(graph, ROOT) == [LIBC, COMPILER, ROOT]
+
+
+def test_schedule_longest_path_and_slack():
+    finish, slack, makespan = module.schedule(GRAPH, DURATIONS, ROOT)
+
+    assert makespan == 16.0
+    assert finish[DOCS] == 7.0
+    assert slack == {ROOT: 0.0, COMPILER: 0.0, DOCS: 8.0, LIBC: 0.0}
+
+
+def test_critical_path():
+    finish, _slack, _makespan = module.schedule(GRAPH, DURATIONS, ROOT)
+
+    assert module.critical_path(GRAPH, finish, ROOT) == [LIBC, COMPILER, ROOT]
+
+
+def test_saving_if_cached_drops_inputs():
+    # caching the compiler also skips building libc for it, but docs needs libc
+    assert module.saving_if_cached(GRAPH, DURATIONS, ROOT, COMPILER, 16.0) == 8.0
+    assert module.saving_if_cached(GRAPH, DURATIONS, ROOT, LIBC, 16.0) == 5.0
+    assert module.saving_if_cached(GRAPH, DURATIONS, ROOT, ROOT, 16.0) == 16.0
+
+
+def test_critical_path_report():
+    report = module.critical_path_report(GRAPH, DURATIONS, ROOT)
+
+    assert report["makespan"] == 16.0
+    assert report["totalWork"] == 18.0
+    assert [item["name"] for item in report["criticalPath"]] == [
+        "libc-2.40",
+        "compiler-2.0",
+        "app-1.0",
+    ]
+    assert report["derivations"][-1]["drv"] == DOCS
+    assert report["derivations"][-1]["earliestStart"] == 5.0
+
+
+def test_main_success(monkeypatch, tmp_path, capsys):
+    timings = tmp_path / "timings.json"
+    timings.write_text(json.dumps({COMPILER: 10, DOCS: 2, LIBC: 5, ROOT: 1}))
+    monkeypatch.setattr(module, "resolve_store_path", lambda value: Path(value))
+    monkeypatch.setattr(module, "run_command", fake_nix)
+
+    module.main("/nix/store/out-app-1.0", timings=timings)
+    report = json.loads(capsys.readouterr().out)
+
+    assert report["root"] == ROOT
+    assert report["makespan"] == 16.0
+
+
+def test_main_invalid_input(tmp_path, capsys):
+    with pytest.raises(typer.Exit) as exc:
+        module.main("/nix/store/missing", timings=tmp_path / "missing.json")
+    captured = capsys.readouterr()
+
+    assert exc.value.exit_code == 2
+    assert "invalid input" in captured.err
+
+
+def test_main_invalid_derivation(monkeypatch, tmp_path, capsys):
+    timings = tmp_path / "timings.json"
+    timings.write_text("{}")
+    monkeypatch.setattr(module, "resolve_store_path", lambda value: Path(value))
+    monkeypatch.setattr(module, "run_command", lambda args, input_text=None: "{}")
+
+    with pytest.raises(typer.Exit) as exc:
+        module.main(ROOT, timings=timings)
+    captured = capsys.readouterr()
+
+    assert exc.value.exit_code == 1
+    assert "invalid derivation" in captured.err
@@ -0,0 +1,349 @@
+import gzip
+import hashlib
+import io
+import json
+import tarfile
+from pathlib import Path
+
+import pytest
+import typer
+
+from nix_seed_tools import oci_layers as module
+
+
+def make_tar(members):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            if data is None:
+                info.type = tarfile.DIRTYPE
+                tar.addfile(info)
+            else:
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def write_blob(layout, data):
+    digest = hashlib.sha256(data).hexdigest()
+    blob = layout / "blobs" / "sha256" / digest
+    blob.parent.mkdir(parents=True, exist_ok=True)
+    blob.write_bytes(data)
+    return f"sha256:{digest}", len(data)
+
+
+LAYER_ONE = [
+    ("nix", None),
+    ("nix/store", None),
+    ("nix/store/aaaaa-foo-1.0", None),
+    ("nix/store/aaaaa-foo-1.0/bin/foo", b"x" * 600),
+    ("./nix/store/bbbbb-bar-2.0/lib/libbar.so", b"y" * 10),
+]
+
+LAYER_TWO = [
+    ("nix/store/bbbbb-bar-2.0/share/doc", b"z" * 20),
+    ("etc/passwd", b"root"),
+]
+
+
+@pytest.fixture
+def layout(tmp_path):
+    layer_one = make_tar(LAYER_ONE)
+    layer_two = make_tar(LAYER_TWO)
+    digest_one, size_one = write_blob(tmp_path, gzip.compress(layer_one))
+    digest_two, size_two = write_blob(tmp_path, layer_two)
+    manifest = {
+        "schemaVersion": 2,
+        "layers": [
+            {
+                "mediaType": "application/vnd.oci.image.layer.v1.tar+gzip",
+                "digest": digest_one,
+                "size": size_one,
+            },
+            {
+                "mediaType": "application/vnd.oci.image.layer.v1.tar",
+                "digest": digest_two,
+                "size": size_two,
+            },
+        ],
+    }
+    manifest_digest, _ = write_blob(tmp_path, json.dumps(manifest).encode())
+    nested = {"manifests": [{"digest": manifest_digest}]}
+    nested_digest, _ = write_blob(tmp_path, json.dumps(nested).encode())
+    index = {"schemaVersion": 2, "manifests": [{"digest": nested_digest}]}
+    (tmp_path / "index.json").write_text(json.dumps(index))
+    (tmp_path / "oci-layout").write_text('{"imageLayoutVersion": "1.0.0"}')
+    return tmp_path
+
+
+NIX2CONTAINER = {
+    "version": 1,
+    "layers": [
+        {
+            "digest": "sha256:one",
+            "size": 2048,
+            "mediatype": "application/vnd.oci.image.layer.v1.tar",
+            "paths": [
+                {"path": "/nix/store/aaaaa-foo-1.0"},
+                {"path": "/nix/store/bbbbb-bar-2.0"},
+                {"options": {}},
+            ],
+        },
+        {
+            "digest": "sha256:two",
+            "size": 1024,
+            "paths": [{"path": "/nix/store/bbbbb-bar-2.0"}],
+        },
+    ],
+}
+
+
+def test_store_path_for_member_variants():
+    assert module.store_path_for_member("nix/store/aaaaa-foo/bin") == (
+        "/nix/store/aaaaa-foo"
+    )
+    assert module.store_path_for_member("./nix/store/aaaaa-foo") == (
+        "/nix/store/aaaaa-foo"
+    )
+    assert module.store_path_for_member("nix/store") is None
+    assert module.store_path_for_member("etc/passwd/x") is None
+
+
+def test_scan_layer_plain_and_gzip(tmp_path):
+    data = make_tar(LAYER_ONE)
+    plain = tmp_path / "plain"
+    plain.write_bytes(data)
+    compressed = tmp_path / "compressed"
+    compressed.write_bytes(gzip.compress(data))
+
+    expected = ["/nix/store/aaaaa-foo-1.0", "/nix/store/bbbbb-bar-2.0"]
+
+    assert module.scan_layer(plain) == (expected, len(data))
+    assert module.scan_layer(compressed) == (expected, len(data))
+
+
+def test_scan_layer_not_tar(tmp_path):
+    blob = tmp_path / "blob"
+    blob.write_bytes(b"not a tar" * 100)
+
+    with pytest.raises(ValueError):
+        module.scan_layer(blob)
+
+
+def test_blob_path_errors(tmp_path):
+    assert module.blob_path(tmp_path, "sha256:abc") == (
+        tmp_path / "blobs" / "sha256" / "abc"
+    )
+    with pytest.raises(ValueError):
+        module.blob_path(tmp_path, "abc")
+    with pytest.raises(ValueError):
+        module.blob_path(tmp_path, "sha256:../x")
+    with pytest.raises(ValueError):
+        module.blob_path(tmp_path, "..:x")
+    with pytest.raises(ValueError):
+        module.blob_path(tmp_path, "sha/256:x")
+
+
+def test_load_json_errors(tmp_path):
+    with pytest.raises(ValueError):
+        module.load_json(tmp_path / "missing.json")
+    bad = tmp_path / "bad.json"
+    bad.write_text("{")
+    with pytest.raises(ValueError):
+        module.load_json(bad)
+
+
+def test_load_oci_layout(layout):
+    layers = module.load_oci_layout(layout)
+
+    assert [layer.paths for layer in layers] == [
+        ["/nix/store/aaaaa-foo-1.0", "/nix/store/bbbbb-bar-2.0"],
+        ["/nix/store/bbbbb-bar-2.0"],
+    ]
+    assert layers[0].uncompressed_size == len(make_tar(LAYER_ONE))
+    assert layers[0].compressed_size < layers[0].uncompressed_size
+    assert layers[1].compressed_size == layers[1].uncompressed_size
+
+
+def write_index(layout, index):
+    (layout / "index.json").write_text(json.dumps(index))
+
+
+def test_resolve_manifest_errors(tmp_path):
+    write_index(tmp_path, {"manifests": []})
+    with pytest.raises(ValueError):
+        module.resolve_manifest(tmp_path)
+    write_index(tmp_path, {"manifests": [{"size": 1}]})
+    with pytest.raises(ValueError):
+        module.resolve_manifest(tmp_path)
+    write_index(tmp_path, {"layers": "bad"})
+    with pytest.raises(ValueError):
+        module.resolve_manifest(tmp_path)
+
+
+AMD64 = {"os": "linux", "architecture": "amd64"}
+ARM64 = {"os": "linux", "architecture": "arm64", "variant": "v8"}
+
+
+def test_platform_name():
+    assert module.platform_name({"platform": ARM64}) == "linux/arm64/v8"
+    assert module.platform_name({"platform": AMD64}) == "linux/amd64"
+    assert module.platform_name({}) is None
+
+
+def test_select_manifest():
+    amd = {"digest": "sha256:a", "platform": AMD64}
+    arm = {"digest": "sha256:b", "platform": ARM64}
+    bare = {"digest": "sha256:c"}
+
+    assert module.select_manifest([amd, arm], "linux/arm64/v8") is arm
+    assert module.select_manifest([bare], "linux/amd64") is bare
+    assert module.select_manifest([amd], None) is amd
+    # a multi-platform index needs a platform
+    with pytest.raises(ValueError, match="--platform"):
+        module.select_manifest([amd, arm], None)
+    with pytest.raises(ValueError):
+        module.select_manifest([amd, arm], "linux/riscv64")
+
+
+def test_resolve_manifest_by_platform(layout):
+    nested = json.loads((layout / "index.json").read_text())["manifests"][0]
+    other = {"digest": "sha256:" + "0" * 64, "platform": ARM64}
+    write_index(layout, {"manifests": [{**nested, "platform": AMD64}, other]})
+
+    manifest = module.resolve_manifest(layout, "linux/amd64")
+
+    assert len(manifest["layers"]) == 2
+    assert len(module.load_layers(layout, "linux/amd64")) == 2
+    with pytest.raises(ValueError):
+        module.resolve_manifest(layout)
+
+
+def test_load_oci_layout_errors(tmp_path):
+    write_index(tmp_path, {"layers": [{"size": 1}]})
+    with pytest.raises(ValueError):
+        module.load_oci_layout(tmp_path)
+    write_index(tmp_path, {"layers": [{"digest": "sha256:missing"}]})
+    with pytest.raises(ValueError):
+        module.load_oci_layout(tmp_path)
+
+
+def test_load_nix2container(tmp_path):
+    image = tmp_path / "image.json"
+    image.write_text(json.dumps(NIX2CONTAINER))
+
+    layers = module.load_nix2container(image)
+
+    assert layers[0].paths == [
+        "/nix/store/aaaaa-foo-1.0",
+        "/nix/store/bbbbb-bar-2.0",
+    ]
+    assert layers[0].uncompressed_size == 2048
+    assert layers[1].media_type == ""
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        [],
+        {"layers": ["bad"]},
+        {"layers": [{"digest": "sha256:x", "size": "big"}]},
+    ],
+)
+def test_load_nix2container_errors(tmp_path, raw):
+    image = tmp_path / "image.json"
+    image.write_text(json.dumps(raw))
+
+    with pytest.raises(ValueError):
+        module.load_nix2container(image)
+
+
+def test_split_paths(layout):
+    layers = module.load_oci_layout(layout)
+
+    assert module.split_paths(layers) == {
+        "/nix/store/bbbbb-bar-2.0": [layers[0].digest, layers[1].digest]
+    }
+
+
+def test_estimate_pull_seconds():
+    # a finished stream hands its bandwidth back to the others
+    assert module.estimate_pull_seconds([100, 300], 400, 2) == 1.0
+    # idle streams do not hold bandwidth back
+    assert module.estimate_pull_seconds([100], 100, 3) == 1.0
+    # layers queue behind the streams in manifest order
+    assert module.estimate_pull_seconds([100, 100, 100], 100, 1) == 3.0
+    assert module.estimate_pull_seconds([], 100, 3) == 0.0
+    assert module.estimate_pull_seconds([0, 100], 100, 2) == 1.0
+    # a per-stream cap leaves the largest layer as the long pole
+    assert module.estimate_pull_seconds([100, 300], 400, 2, 100) == 3.0
+    with pytest.raises(ValueError):
+        module.estimate_pull_seconds([1], 0, 1)
+    with pytest.raises(ValueError):
+        module.estimate_pull_seconds([1], 1, 0)
+    with pytest.raises(ValueError):
+        module.estimate_pull_seconds([1], 1, 1, 0)
+
+
+def test_layer_report(tmp_path):
+    image = tmp_path / "image.json"
+    image.write_text(json.dumps(NIX2CONTAINER))
+
+    report = module.layer_report(module.load_layers(image), 1024, 2)
+
+    assert report["compressedSize"] == 3072
+    assert report["uncompressedSize"] == 3072
+    assert report["splitPaths"] == {
+        "/nix/store/bbbbb-bar-2.0": ["sha256:one", "sha256:two"]
+    }
+    assert report["pull"]["seconds"] == 3.0
+
+
+def test_load_layers_dispatch(layout):
+    assert len(module.load_layers(layout)) == 2
+
+
+def test_main_success(layout, capsys):
+    module.main(Path(layout), bandwidth_mib=1.0, concurrency=2)
+    captured = capsys.readouterr()
+    report = json.loads(captured.out)
+
+    assert len(report["layers"]) == 2
+    assert report["pull"]["concurrency"] == 2
+    assert report["pull"]["streamBandwidth"] == (
+        module.DEFAULT_STREAM_BANDWIDTH_MIB * 1024 * 1024
+    )
+
+
+def test_main_concurrency_matters_by_default(tmp_path, capsys):
+    mib = 1024 * 1024
+    image = tmp_path / "image.json"
+    image.write_text(
+        json.dumps(
+            {"layers": [{"digest": f"sha256:{n}", "size": 100 * mib} for n in range(6)]}
+        )
+    )
+    seconds = []
+    for concurrency in (1, 3, 6):
+        module.main(image, bandwidth_mib=100.0, concurrency=concurrency)
+        seconds.append(json.loads(capsys.readouterr().out)["pull"]["seconds"])
+
+    # one 32 MiB/s connection, three of them, then the 100 MiB/s link
+    assert seconds == pytest.approx([600 / 32, 600 / 96, 6.0])
+
+
+def test_main_stream_bandwidth(layout, capsys):
+    module.main(Path(layout), bandwidth_mib=4.0, stream_bandwidth_mib=1.0)
+    report = json.loads(capsys.readouterr().out)
+
+    assert report["pull"]["streamBandwidth"] == 1024 * 1024
+
+
+def test_main_failure(tmp_path, capsys):
+    with pytest.raises(typer.Exit) as exc:
+        module.main(tmp_path / "missing.json")
+    captured = capsys.readouterr()
+
+    assert exc.value.exit_code == 2
+    assert "invalid image" in captured.err
@@ -0,0 +1,361 @@
+import json
+from pathlib import Path
+
+import pytest
+import typer
+
+from nix_seed_tools import seed_content as module
+from nix_seed_tools.nix_path_mermaid import PathInfo
+
+
+SHELL_DRV = "/nix/store/sss-dev-shell.drv"
+DOCS_DRV = "/nix/store/ddd-docs-site-1.0.drv"
+
+DERIVATIONS = {
+    SHELL_DRV: {
+        "inputDrvs": {
+            "/nix/store/ggg-gcc-13.drv": {"outputs": ["out"]},
+            "/nix/store/ppp-python-3.13.drv": {"outputs": ["out"]},
+        },
+        "inputSrcs": ["/nix/store/bbb-stdenv-setup.sh"],
+        "outputs": {"out": {"path": "/nix/store/shell-dev-shell"}},
+    },
+    "/nix/store/ggg-gcc-13.drv": {
+        "outputs": {"out": {"path": "/nix/store/gcc-gcc-13"}},
+    },
+    # newer nix emits keys without the store directory
+    "ppp-python-3.13.drv": {
+        "outputs": {"out": {"path": "/nix/store/py-python-3.13"}},
+    },
+    # stdenv and the builder script are inputs, but mkSeed does not copy them
+    DOCS_DRV: {
+        "inputDrvs": {"/nix/store/ggg-gcc-13.drv": {"outputs": ["out"]}},
+        "inputSrcs": ["/nix/store/bbb-stdenv-setup.sh"],
+        "env": {
+            "nativeBuildInputs": "/nix/store/doc-docs-1.0",
+            "buildInputs": "",
+            "stdenv": "/nix/store/gcc-gcc-13",
+        },
+        "outputs": {"out": {"path": "/nix/store/site-docs-site-1.0"}},
+    },
+}
+
+REQUIRED_INFO = [
+    {"path": "/nix/store/gcc-gcc-13", "narSize": 100, "references": []},
+    {
+        "path": "/nix/store/py-python-3.13",
+        "narSize": 200,
+        "references": ["/nix/store/lib-glibc-2.40"],
+    },
+    {"path": "/nix/store/lib-glibc-2.40", "narSize": 50, "references": []},
+    {"path": "/nix/store/bbb-stdenv-setup.sh", "narSize": 1, "references": []},
+]
+
+SEED_ROOT = "/nix/store/seed-dev-seed.json"
+
+SEED_INFO = [
+    {
+        "path": SEED_ROOT,
+        "narSize": 5,
+        "references": [
+            "/nix/store/gcc-gcc-13",
+            "/nix/store/py-python-3.13",
+            "/nix/store/nix-nix-2.31",
+            "/nix/store/doc-docs-1.0",
+        ],
+    },
+    {"path": "/nix/store/gcc-gcc-13", "narSize": 100, "references": []},
+    {
+        "path": "/nix/store/py-python-3.13",
+        "narSize": 200,
+        "references": ["/nix/store/lib-glibc-2.40"],
+    },
+    {"path": "/nix/store/lib-glibc-2.40", "narSize": 50, "references": []},
+    {
+        "path": "/nix/store/nix-nix-2.31",
+        "narSize": 70,
+        "references": ["/nix/store/lib-glibc-2.40", "/nix/store/cur-curl-8"],
+    },
+    {"path": "/nix/store/cur-curl-8", "narSize": 30, "references": []},
+    {
+        "path": "/nix/store/doc-docs-1.0",
+        "narSize": 400,
+        "references": ["/nix/store/doc-docs-1.0", "/nix/store/tex-texlive-2024"],
+    },
+    {"path": "/nix/store/tex-texlive-2024", "narSize": 600, "references": []},
+]
+
+
+def fake_nix(args, input_text=None):
+    if args[:3] == ["nix", "derivation", "show"]:
+        wanted = input_text.split()
+        return json.dumps(
+            {
+                key: value
+                for key, value in DERIVATIONS.items()
+                if key in wanted or f"/nix/store/{key}" in wanted
+            }
+        )
+    if args[:2] == ["nix", "path-info"]:
+        if args[-1] == SEED_ROOT:
+            return json.dumps(SEED_INFO)
+        return json.dumps(REQUIRED_INFO)
+    if args[:3] == ["nix-store", "--query", "--deriver"]:
+        return SHELL_DRV + "\n"
+    raise AssertionError("unexpected command")
+
+
+def path_info(items):
+    return {
+        item["path"]: PathInfo(
+            path=item["path"],
+            nar_size=item["narSize"],
+            closure_size=None,
+            references=item["references"],
+        )
+        for item in items
+    }
+
+
+def test_required_roots_follows_input_drvs_and_srcs():
+    roots = module.required_roots(SHELL_DRV, fake_nix)
+
+    assert roots == [
+        "/nix/store/bbb-stdenv-setup.sh",
+        "/nix/store/gcc-gcc-13",
+        "/nix/store/py-python-3.13",
+    ]
+
+
+def test_required_roots_bare_paths():
+    # newer nix omits the store directory from keys and values alike
+    derivations = {
+        "sss-dev-shell.drv": {
+            "inputDrvs": {"ggg-gcc-13.drv": {"outputs": ["out"]}},
+            "inputSrcs": ["bbb-stdenv-setup.sh"],
+        },
+        "ggg-gcc-13.drv": {"outputs": {"out": {"path": "gcc-gcc-13"}}},
+    }
+
+    def fake_run(args, input_text=None):
+        return json.dumps(derivations)
+
+    assert module.required_roots(SHELL_DRV, fake_run) == [
+        "/nix/store/bbb-stdenv-setup.sh",
+        "/nix/store/gcc-gcc-13",
+    ]
+
+
+def test_required_roots_missing_output():
+    def fake_run(args, input_text=None):
+        return json.dumps(
+            {
+                SHELL_DRV: {"inputDrvs": {"/nix/store/x.drv": ["dev"]}},
+                "/nix/store/x.drv": {"outputs": {"out": {"path": "/nix/store/x"}}},
+            }
+        )
+
+    with pytest.raises(ValueError):
+        module.required_roots(SHELL_DRV, fake_run)
+
+
+def test_closure_within_ignores_unknown_paths():
+    info = path_info(SEED_INFO)
+
+    assert module.closure_within(["/nix/store/missing"], info) == set()
+    assert module.closure_within(["/nix/store/nix-nix-2.31"], info) == {
+        "/nix/store/nix-nix-2.31",
+        "/nix/store/lib-glibc-2.40",
+        "/nix/store/cur-curl-8",
+    }
+
+
+def test_analyze_seed_reports_droppable_and_filter():
+    report = module.analyze_seed(
+        SEED_ROOT,
+        path_info(SEED_INFO),
+        path_info(REQUIRED_INFO),
+    )
+
+    assert report["seedBytes"] == 1455
+    assert report["requiredBytes"] == 351
+    assert report["droppableBytes"] == 1000
+    assert [item["path"] for item in report["droppable"]] == [
+        "/nix/store/tex-texlive-2024",
+        "/nix/store/doc-docs-1.0",
+    ]
+    assert report["missing"] == ["/nix/store/bbb-stdenv-setup.sh"]
+    assert report["droppableRoots"] == [
+        {
+            "name": "docs-1.0",
+            "path": "/nix/store/doc-docs-1.0",
+            "bytes": 1000,
+            "contributedBy": [],
+        }
+    ]
+    assert report["selfFilter"] == []
+
+
+def test_analyze_seed_without_keep_drops_nix():
+    report = module.analyze_seed(
+        SEED_ROOT,
+        path_info(SEED_INFO),
+        path_info(REQUIRED_INFO),
+        keep=[],
+    )
+
+    names = [item["name"] for item in report["droppableRoots"]]
+
+    assert names == ["docs-1.0", "nix-2.31"]
+    assert report["droppableBytes"] == 1100
+
+
+def test_analyze_seed_default_keep_covers_mkseed_contents():
+    shipped = [
+        "/nix/store/ccl-gcc-13.3.0-lib",
+        "/nix/store/nod-nodejs-22.11.0",
+        "/nix/store/set-setup",
+        "/nix/store/att-attest-and-sign",
+        "/nix/store/bus-busybox-1.36.1",
+    ]
+    seed = [
+        {"path": SEED_ROOT, "narSize": 5, "references": shipped},
+        *({"path": path, "narSize": 10, "references": []} for path in shipped),
+    ]
+
+    report = module.analyze_seed(SEED_ROOT, path_info(seed), {})
+
+    assert report["droppableBytes"] == 0
+
+
+def test_analyze_seed_self_filter():
+    app = "/nix/store/app-app-1.0.drv"
+    docs = "/nix/store/dd-docs-site-1.0.drv"
+    contributions = {
+        app: ["/nix/store/gcc-gcc-13", "/nix/store/doc-docs-1.0"],
+        docs: ["/nix/store/doc-docs-1.0", "/nix/store/src-not-in-seed"],
+        "/nix/store/ee-empty-1.0.drv": [],
+    }
+
+    report = module.analyze_seed(
+        SEED_ROOT,
+        path_info(SEED_INFO),
+        path_info(REQUIRED_INFO),
+        contributions=contributions,
+    )
+
+    assert report["droppableRoots"][0]["contributedBy"] == ["app-1.0", "docs-site-1.0"]
+    # app also ships the compiler the shell needs, so only docs-site can go
+    assert report["selfFilter"] == [
+        {"name": "docs-site-1.0", "drv": docs, "bytes": 1000}
+    ]
+
+
+def test_parse_declared_inputs():
+    env = {
+        "buildInputs": "/nix/store/a-foo /nix/store/b-bar",
+        "propagatedBuildInputs": "/nix/store/a-foo",
+        "nativeBuildInputs": "",
+        "builder": "/nix/store/c-bash/bin/bash",
+    }
+    structured = {"__json": json.dumps({"buildInputs": ["d-baz"], "name": "x"})}
+
+    assert module.parse_declared_inputs({"env": env}) == [
+        "/nix/store/a-foo",
+        "/nix/store/b-bar",
+    ]
+    assert module.parse_declared_inputs({"env": structured}) == ["/nix/store/d-baz"]
+    assert module.parse_declared_inputs({}) == []
+
+
+@pytest.mark.parametrize(
+    "env",
+    [
+        [],
+        {"__json": "{"},
+        {"__json": "[]"},
+        {"buildInputs": 1},
+    ],
+)
+def test_parse_declared_inputs_errors(env):
+    with pytest.raises(ValueError):
+        module.parse_declared_inputs({"env": env})
+
+
+def test_self_contributions():
+    assert module.self_contributions([DOCS_DRV, SHELL_DRV], fake_nix) == {
+        DOCS_DRV: ["/nix/store/doc-docs-1.0"],
+        SHELL_DRV: [],
+    }
+
+
+def test_seed_content_report():
+    report = module.seed_content_report(
+        "/nix/store/shell-dev-shell",
+        Path(SEED_ROOT),
+        fake_nix,
+        self_paths=[DOCS_DRV],
+    )
+
+    assert report["shell"] == SHELL_DRV
+    assert report["droppableBytes"] == 1000
+    assert report["droppableRoots"][0]["contributedBy"] == ["docs-site-1.0"]
+    assert report["selfFilter"] == [
+        {"name": "docs-site-1.0", "drv": DOCS_DRV, "bytes": 1000}
+    ]
+
+
+def test_main_success(monkeypatch, capsys):
+    calls = []
+
+    def fake_resolve(value):
+        return Path(value)
+
+    def fake_report(shell, seed_root, run, keep, self_paths):
+        calls.append((keep, self_paths))
+        return {"droppableBytes": 1}
+
+    monkeypatch.setattr(module, "resolve_store_path", fake_resolve)
+    monkeypatch.setattr(module, "seed_content_report", fake_report)
+
+    module.main(SHELL_DRV, SEED_ROOT)
+    module.main(SHELL_DRV, SEED_ROOT, keep=["nix-*"], self_paths=["/nix/store/a"])
+    captured = capsys.readouterr()
+
+    assert '"droppableBytes": 1' in captured.out
+    assert calls == [
+        (module.DEFAULT_KEEP, []),
+        (["nix-*"], ["/nix/store/a"]),
+    ]
+
+
+def test_main_invalid_path(monkeypatch, capsys):
+    def fake_resolve(value):
+        raise ValueError("bad")
+
+    monkeypatch.setattr(module, "resolve_store_path", fake_resolve)
+
+    with pytest.raises(typer.Exit) as exc:
+        module.main("bad", "bad")
+    captured = capsys.readouterr()
+
+    assert exc.value.exit_code == 2
+    assert "invalid store path" in captured.err
+
+
+def test_main_invalid_derivation(monkeypatch, capsys):
+    def fake_resolve(value):
+        return Path(value)
+
+    def fake_report(shell, seed_root, run, keep, self_paths):
+        raise ValueError("bad")
+
+    monkeypatch.setattr(module, "resolve_store_path", fake_resolve)
+    monkeypatch.setattr(module, "seed_content_report", fake_report)
+
+    with pytest.raises(typer.Exit) as exc:
+        module.main(SHELL_DRV, SEED_ROOT)
+    captured = capsys.readouterr()
+
+    assert exc.value.exit_code == 1
+    assert "invalid derivation" in captured.err
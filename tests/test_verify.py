@@ -0,0 +1,235 @@
+import base64
+import json
+import threading
+from pathlib import Path
+
+import pytest
+import typer
+
+from nix_seed_tools import verify as module
+
+
+def statement(*subjects):
+    return {
+        "_type": "https://in-toto.io/Statement/v1",
+        "subject": [
+            {"name": name, "digest": {"sha256": digest}} for name, digest in subjects
+        ],
+        "predicateType": "https://github.com/0compute/nix-seed",
+        "predicate": {},
+    }
+
+
+def envelope(payload):
+    encoded = base64.b64encode(json.dumps(payload).encode()).decode()
+    return {"payloadType": "application/vnd.in-toto+json", "payload": encoded}
+
+
+def make_attestations(directory, *documents):
+    directory.mkdir(parents=True, exist_ok=True)
+    for index, document in enumerate(documents, start=1):
+        path = directory / f"attest-{index}.json"
+        if isinstance(document, str):
+            path.write_text(document)
+        else:
+            path.write_text(json.dumps(document))
+    return sorted(directory.glob("*.json"))
+
+
+def container(digest):
+    return {"containerDigest": digest}
+
+
+def test_subject_digest_single_and_multi():
+    assert module.subject_digest((("a", "sha256", "abc"),)) == "sha256:abc"
+    multi = module.subject_digest((("a", "sha256", "abc"), ("b", "sha256", "def")))
+
+    assert multi.startswith("sha256:")
+    assert multi != "sha256:abc"
+
+
+def test_attestation_digest_formats():
+    ordered = statement(("a", "111"), ("b", "222"))
+    reordered = statement(("b", "222"), ("a", "111"))
+
+    assert module.attestation_digest(container("sha256:one")) == "sha256:one"
+    assert module.attestation_digest(statement(("img", "abc"))) == "sha256:abc"
+    assert module.attestation_digest(ordered) == module.attestation_digest(reordered)
+    assert module.attestation_digest(envelope(ordered)) == (
+        module.attestation_digest(ordered)
+    )
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        [],
+        {"payload": "not base64!"},
+        envelope([]),
+        {"containerDigest": ""},
+        {"subject": ["bad"]},
+        {"subject": [{"name": "a", "digest": {}}]},
+    ],
+)
+def test_attestation_digest_errors(raw):
+    with pytest.raises(ValueError):
+        module.attestation_digest(raw)
+
+
+def test_load_attestation_errors(tmp_path):
+    with pytest.raises(ValueError):
+        module.load_attestation(tmp_path / "missing.json")
+    bad = tmp_path / "bad.json"
+    bad.write_text("{")
+    with pytest.raises(ValueError):
+        module.load_attestation(bad)
+
+
+def test_verify_quorum_insufficient(tmp_path):
+    files = make_attestations(tmp_path, container("sha256:one"))
+
+    report = module.verify_quorum(files, 2)
+
+    assert not report.passed
+    assert report.reason == "insufficient attestations: found 1, need 2"
+    assert report.checked == 0
+
+
+def test_verify_quorum_strict_pass(tmp_path):
+    files = make_attestations(
+        tmp_path,
+        container("sha256:same"),
+        statement(("img", "same")),
+        envelope(statement(("img", "same"))),
+    )
+
+    report = module.verify_quorum(files, 2, max_workers=2)
+
+    assert report.passed
+    assert report.digest == "sha256:same"
+    assert report.checked == 3
+    assert report.reason == "verified 3 attestations for sha256:same"
+
+
+def test_verify_quorum_strict_mismatch(tmp_path):
+    files = make_attestations(
+        tmp_path,
+        container("sha256:one"),
+        container("sha256:two"),
+        container("sha256:one"),
+    )
+
+    report = module.verify_quorum(files, 2, max_workers=1)
+
+    assert not report.passed
+    assert report.reason == "digest mismatch across attestations"
+
+
+def test_verify_quorum_strict_invalid(tmp_path):
+    files = make_attestations(tmp_path, container("sha256:one"), "{")
+
+    report = module.verify_quorum(files, 2, max_workers=1)
+
+    assert not report.passed
+    assert report.reason.startswith("invalid attestation")
+    assert report.invalid == [str(files[1])]
+
+
+def test_verify_quorum_n_of_m_exits_early(tmp_path, monkeypatch):
+    files = make_attestations(
+        tmp_path,
+        container("sha256:one"),
+        container("sha256:one"),
+        container("sha256:two"),
+        container("sha256:one"),
+    )
+    release = threading.Event()
+    load_attestation = module.load_attestation
+
+    def slow_load(path):
+        # attestations after the quorum block until the test releases them
+        if path.name in ("attest-3.json", "attest-4.json"):
+            release.wait()
+        return load_attestation(path)
+
+    monkeypatch.setattr(module, "load_attestation", slow_load)
+
+    try:
+        report = module.verify_quorum(files, 2, strict=False, max_workers=4)
+    finally:
+        release.set()
+
+    assert report.passed
+    assert report.digest == "sha256:one"
+    assert report.checked == 2
+
+
+def test_verify_quorum_n_of_m_unreachable(tmp_path):
+    files = make_attestations(
+        tmp_path,
+        container("sha256:one"),
+        "{",
+        container("sha256:two"),
+        container("sha256:one"),
+    )
+
+    report = module.verify_quorum(files, 3, strict=False, max_workers=1)
+
+    assert not report.passed
+    assert report.reason == "quorum cannot be reached"
+
+
+def test_verify_quorum_nothing_required():
+    with pytest.raises(ValueError):
+        module.verify_quorum([], 0)
+
+
+def test_report_json(tmp_path):
+    files = make_attestations(tmp_path, container("sha256:b"), container("sha256:a"))
+
+    payload = module.report_json(module.verify_quorum(files, 1, strict=False))
+
+    assert payload["passed"] is True
+    assert payload["required"] == 1
+    assert payload["total"] == 2
+    assert json.loads(json.dumps(payload)) == payload
+
+
+def test_main_pass(tmp_path, capsys):
+    make_attestations(tmp_path, container("sha256:same"), container("sha256:same"))
+
+    module.main(attest_dir=Path(tmp_path), required=2)
+    captured = capsys.readouterr()
+
+    assert json.loads(captured.out)["passed"] is True
+    assert "verified 2 attestations" in captured.err
+
+
+def test_main_fail(tmp_path, capsys):
+    make_attestations(tmp_path, container("sha256:one"), container("sha256:two"))
+
+    with pytest.raises(typer.Exit) as exc:
+        module.main(attest_dir=Path(tmp_path), required=2, quorum=True)
+    captured = capsys.readouterr()
+
+    assert exc.value.exit_code == 1
+    assert json.loads(captured.out)["passed"] is False
+    assert "quorum cannot be reached" in captured.err
+
+
+def test_main_nothing_required(tmp_path, capsys):
+    with pytest.raises(typer.Exit) as exc:
+        module.main(attest_dir=Path(tmp_path), required=0)
+    captured = capsys.readouterr()
+
+    assert exc.value.exit_code == 2
+    assert "invalid quorum" in captured.err
+
+
+def test_main_missing_dir(tmp_path, capsys):
+    with pytest.raises(typer.Exit) as exc:
+        module.main(attest_dir=tmp_path / "nope")
+    captured = capsys.readouterr()
+
+    assert exc.value.exit_code == 1
+    assert "attestations dir missing" in captured.err